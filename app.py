@@ -6,7 +6,7 @@ from src.schemas import OCRResponse
 from src.utils.pdf import rasterize_pdf_if_needed
 from src.utils.image_quality import assess_quality
 from src.utils.preproc import enhance_image, upscale_if_needed, deskew_image
-from src.services.ocr_engine import get_ocr, ocr_tokens
+from src.services.ocr_engine import models_loaded, ocr_tokens_async, start_pool
 from src.services.table_extract import extract_table
 from src.services.layout_parser import parse_header_blocks
 from src.services.postprocess import build_response
@@ -16,10 +16,19 @@ from src.logging_conf import setup_logging
 import config
 import time
 import cv2
+from contextlib import asynccontextmanager
 from typing import Dict, Any
 
 
+@asynccontextmanager
+async def lifespan(app):
+    """Start the OCR worker pool at startup so /health reports real warm-up."""
+    start_pool()
+    yield
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="OCR Service API",
     description="""
     A production-ready OCR microservice for extracting structured data from invoice images and PDFs.
@@ -114,8 +123,7 @@ def health():
         - uptimeSec: Service uptime in seconds
     """
     try:
-        ocr = get_ocr()
-        is_warm = ocr is not None
+        is_warm = models_loaded()
     except:
         is_warm = False
     return {
@@ -229,8 +237,7 @@ async def visualize(file: UploadFile = File(..., description="Image or PDF file
     image_bgr = upscale_if_needed(image_bgr)
     
     # Run OCR
-    ocr = get_ocr()
-    tokens = ocr_tokens(ocr, image_bgr)
+    tokens = await ocr_tokens_async(image_bgr)
     
     # Draw bounding boxes
     import numpy as np
@@ -465,8 +472,6 @@ async def parse(
         extracted_totals = None
         hashes = compute_hashes(pages_bgr[0], raw) if pages_bgr else None
         
-        ocr = get_ocr()
-        
         for page_idx, image_bgr in enumerate(pages_bgr):
             # Assess quality for this page
             page_quality = assess_quality(image_bgr, content_type=file.content_type)
@@ -501,14 +506,14 @@ async def parse(
                 )
             
             # Preprocess
-            processed_img = enhance_image(image_bgr)
+            processed_img = enhance_image(image_bgr, page_quality)
             processed_img = upscale_if_needed(processed_img)
             skew_angle = page_quality.get("skewDeg", 0.0)
             if abs(skew_angle) > 0.5:
                 processed_img = deskew_image(processed_img, skew_angle)
             
             # Run OCR on this page
-            tokens = ocr_tokens(ocr, processed_img)
+            tokens = await ocr_tokens_async(processed_img)
             
             if not tokens:
                 logger.warning(f"No tokens extracted from page {page_idx + 1}")
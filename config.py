@@ -7,11 +7,17 @@ APP_PORT = int(os.getenv("APP_PORT", "8080"))
 APP_WORKERS = int(os.getenv("APP_WORKERS", "2"))
 OCR_LANG = os.getenv("OCR_LANG", "en")
 OCR_USE_GPU = os.getenv("OCR_USE_GPU", "false")
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "0"))
 MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "12"))
 MAX_PAGES = int(os.getenv("MAX_PAGES", "2"))
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "0"))
+SCRATCH_BUFFER_MAX_MB = int(os.getenv("SCRATCH_BUFFER_MAX_MB", "16"))
 MIN_FOCUS = float(os.getenv("MIN_FOCUS", "80"))
+FOCUS_METRIC = os.getenv("FOCUS_METRIC", "laplacian").lower()
 MAX_GLARE = float(os.getenv("MAX_GLARE", "0.08"))
 REJECT_IF_BAD_QUALITY = os.getenv("REJECT_IF_BAD_QUALITY", "true").lower() == "true"
+HIGH_QUALITY_DENOISE = os.getenv("HIGH_QUALITY_DENOISE", "false").lower() == "true"
+FOCUS_SKIP_DENOISE = float(os.getenv("FOCUS_SKIP_DENOISE", "500"))
 DEBUG = os.getenv("DEBUG", "false").lower() == "true"
 
 # PP-Structure settings
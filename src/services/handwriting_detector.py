@@ -87,33 +87,44 @@ def ocr_with_trocr(image_crop):
     
     Returns (text, confidence).
     """
+    return ocr_with_trocr_batch([image_crop])[0]
+
+
+def ocr_with_trocr_batch(image_crops):
+    """
+    Run TrOCR on several handwritten text regions in one forward pass.
+    
+    Returns a list of (text, confidence), one per crop.
+    """
+    if not image_crops:
+        return []
     try:
         processor, model = get_trocr_model()
         
-        # Convert BGR to RGB PIL Image
-        if len(image_crop.shape) == 3:
-            rgb = cv2.cvtColor(image_crop, cv2.COLOR_BGR2RGB)
-        else:
-            rgb = cv2.cvtColor(image_crop, cv2.COLOR_GRAY2RGB)
-        pil_img = Image.fromarray(rgb)
+        # Convert BGR to RGB PIL Images
+        pil_imgs = []
+        for crop in image_crops:
+            if len(crop.shape) == 3:
+                rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+            else:
+                rgb = cv2.cvtColor(crop, cv2.COLOR_GRAY2RGB)
+            pil_imgs.append(Image.fromarray(rgb))
         
         # Process
-        pixel_values = processor(pil_img, return_tensors="pt").pixel_values
+        pixel_values = processor(pil_imgs, return_tensors="pt").pixel_values
         if torch.cuda.is_available() and config.OCR_USE_GPU.lower() == "true":
             pixel_values = pixel_values.cuda()
         
         # Generate
         generated_ids = model.generate(pixel_values)
-        generated_text = processor.batch_decode(generated_ids, skip_special_tokens=True)[0]
+        generated_texts = processor.batch_decode(generated_ids, skip_special_tokens=True)
         
         # TrOCR doesn't provide confidence directly, use a heuristic
         # based on text length and model certainty
-        confidence = 0.75 if len(generated_text) > 0 else 0.0
-        
-        return generated_text, confidence
+        return [(text, 0.75 if len(text) > 0 else 0.0) for text in generated_texts]
     except Exception as e:
         print(f"TrOCR failed: {e}")
-        return "", 0.0
+        return [("", 0.0)] * len(image_crops)
 
 
 def enhance_token_with_handwriting_detection(token, image_bgr):
@@ -5,6 +5,46 @@ Uses robust anchor-based extraction with flexible regex patterns.
 import re
 from typing import Dict, Any, List, Optional
 
+from ..utils.fields import scan_fields
+
+_ICD = re.IGNORECASE | re.DOTALL
+
+# Product code/name tokens: uppercase alphanumerics, 4-29 chars
+_DESC_RE = re.compile(r'[A-Z0-9\s.]{4,29}\Z')
+
+# Buyer block line probes
+_GSTIN_LINE_RE = re.compile(r"GSTIN.*?([A-Z0-9]{15})", re.I)
+# A contact needs a Contact/Phone/Mob label or a run of 7+ digits, so dates
+# and PIN codes in the address lines do not match
+_CONTACT_LINE_RE = re.compile(r"(?:\b(?:Contact|Phone|Mob)[^\d+\n]*|(?=\+?\d{7}))(\+?\d[\d\-\s]{5,}\d)", re.I)
+
+# Header/totals fields scanned in one pass. Each alternative sits inside a
+# lookahead so overlapping fields (e.g. "Date" inside "Ack Date") are still
+# found, and each carries exactly one named group holding the value.
+_HEADER_FIELDS_RE = re.compile(
+    r"(?="
+    r"Invoice\s*No\.?\s*[:\.\-]?\s*(?P<invoiceNumber>[A-Za-z0-9\/\-]+)"
+    r"|\b(?:Date|Dated)\s*[:\.\-]?\s*(?P<invoiceDate>[0-9]{1,2}[-/][0-9]{1,2}[-/][0-9]{2,4})"
+    r"|Place\s*of\s*Supply\s*[:\.\-]?\s*(?P<placeOfSupply>[^\n\r]+)"
+    r"|Reference\s*No\.?\s*[:\.\-]?\s*(?P<referenceNo>[A-Za-z0-9\/\-]+)"
+    r"|\bIRN\s*[:\.\-]?\s*(?P<irn>[a-f0-9\-]{10,})"
+    r"|Ack\s*Date\s*[:\.\-]?\s*(?P<ackDate>[0-9]{1,2}[-/][0-9]{1,2}[-/][0-9]{2,4})"
+    r"|Ack(?:nowledge)?(?:ment)?\s*(?:No\.?)?\s*[:\.\-]?\s*(?P<ackNo>[0-9]+)"
+    r")",
+    re.IGNORECASE
+)
+_TOTALS_FIELDS_RE = re.compile(
+    r"(?="
+    r"Sub\s*Total\s*₹?\s*(?P<subTotal>[0-9][0-9,]*(?:\.\d+)?)"
+    r"|SGST@[\d\.]*%?\s*₹?\s*(?P<sgst>[0-9][0-9,]*(?:\.\d+)?)"
+    r"|CGST@[\d\.]*%?\s*₹?\s*(?P<cgst>[0-9][0-9,]*(?:\.\d+)?)"
+    r"|Round\s*[Oo]ff\s*[-]?\s*₹?\s*(?P<roundOff>-?[0-9][0-9,]*(?:\.\d+)?)"
+    r"|Taxable\s*Value\s*₹?\s*(?P<taxableValue>[0-9][0-9,]*(?:\.\d+)?)"
+    r"|Tax\s*Amount\s*\(in\s*words\)\s*:?\s*INR\s+(?P<taxInWords>[^\.]+)"
+    r")",
+    re.IGNORECASE
+)
+
 
 def regex_get(pattern: str, text: str, flags=re.IGNORECASE) -> Optional[str]:
     """Extract text using regex pattern."""
@@ -20,10 +60,15 @@ def normalize_amount(s: str) -> Optional[float]:
     s = re.sub(r'[^\d\.\-]', '', s)
     try:
         return round(float(s), 2)
-    except:
+    except ValueError:
         return None
 
 
+def _to_amount(s: str) -> float:
+    """Convert an already-captured numeric run like '1,234.50' to float."""
+    return round(float(s.replace(',', '')), 2)
+
+
 def get_full_text_string(full_text: List[Dict]) -> str:
     """Convert fullText array to single string, preserving reading order."""
     if not full_text:
@@ -42,26 +87,27 @@ def get_full_text_string(full_text: List[Dict]) -> str:
 def extract_invoice_header(full_text_str: str) -> Dict[str, Any]:
     """Extract invoice header using flexible regex patterns."""
     header = {}
+    fields = scan_fields(_HEADER_FIELDS_RE, full_text_str)
     
     # Invoice number - handle variations: "Invoice No.", "Invoice No:", "Invoice No.-"
-    header['invoiceNumber'] = regex_get(r"Invoice\s*No\.?\s*[:\.\-]?\s*([A-Za-z0-9\/\-]+)", full_text_str)
+    header['invoiceNumber'] = fields.get('invoiceNumber')
     
     # Invoice date - handle "Date:", "Dated:", "Date -", etc.
-    header['invoiceDate'] = regex_get(r"\b(?:Date|Dated)\s*[:\.\-]?\s*([0-9]{1,2}[-/][0-9]{1,2}[-/][0-9]{2,4})", full_text_str)
+    header['invoiceDate'] = fields.get('invoiceDate')
     
     # Place of supply
-    header['placeOfSupply'] = regex_get(r"Place\s*of\s*Supply\s*[:\.\-]?\s*([^\n\r]+)", full_text_str)
+    header['placeOfSupply'] = fields.get('placeOfSupply')
     
-    # Reference number and date
-    header['referenceNo'] = regex_get(r"Reference\s*No\.?\s*[:\.\-]?\s*([A-Za-z0-9\/\-]+)", full_text_str)
+    # Reference number and date (date shares the "Reference" anchor, so it is searched separately)
+    header['referenceNo'] = fields.get('referenceNo')
     header['referenceDate'] = regex_get(r"Reference.*?([0-9]{1,2}[-/][0-9]{1,2}[-/][0-9]{2,4})", full_text_str)
     
     # IRN (long alphanumeric hash)
-    header['irn'] = regex_get(r"\bIRN\s*[:\.\-]?\s*([a-f0-9\-]{10,})", full_text_str)
+    header['irn'] = fields.get('irn')
     
     # Acknowledgement
-    ack_no = regex_get(r"Ack(?:nowledge)?(?:ment)?\s*(?:No\.?)?\s*[:\.\-]?\s*([0-9]+)", full_text_str)
-    ack_date = regex_get(r"Ack\s*Date\s*[:\.\-]?\s*([0-9]{1,2}[-/][0-9]{1,2}[-/][0-9]{2,4})", full_text_str)
+    ack_no = fields.get('ackNo')
+    ack_date = fields.get('ackDate')
     
     if ack_no:
         header['acknowledgement'] = {
@@ -82,7 +128,7 @@ def extract_seller(full_text_str: str) -> Dict[str, Any]:
     seller_block = regex_get(
         r"(For:.*?)(?:Authorized\s*Signatory|Bill\s*To|Invoice\s*Details)",
         full_text_str,
-        flags=re.IGNORECASE | re.DOTALL
+        flags=_ICD
     )
     
     if seller_block:
@@ -96,7 +142,7 @@ def extract_seller(full_text_str: str) -> Dict[str, Any]:
         seller_block = regex_get(
             r'(M/s\s+.*?)(?:Buyer|Bill\s*To|GSTIN/UIN)',
             full_text_str,
-            flags=re.IGNORECASE | re.DOTALL
+            flags=_ICD
         )
         if seller_block:
             seller['raw'] = seller_block
@@ -135,29 +181,28 @@ def extract_buyer(full_text_str: str) -> Dict[str, Any]:
     buyer_match = re.search(
         r"Bill\s*To(.*?)(?:Invoice\s*Details|Invoice\s*No|Invoice\s*No\.)",
         full_text_str,
-        flags=re.IGNORECASE | re.DOTALL
+        flags=_ICD
     )
     
     if buyer_match:
         block = buyer_match.group(1).strip()
         buyer['raw'] = " ".join(block.split())
         
-        # Name (first non-empty line)
-        lines = [l.strip() for l in block.split('\n') if l.strip()]
+        # Name (first non-empty line); strip each line only once
+        lines = [l for l in map(str.strip, block.split('\n')) if l]
         if lines:
             buyer['name'] = lines[0]
             
             # Find contact and GSTIN
             for ln in lines:
-                if re.search(r'GSTIN', ln, re.IGNORECASE):
-                    g = re.search(r"GSTIN.*?([A-Z0-9]{15})", ln, re.IGNORECASE)
-                    if g:
-                        buyer['gstin'] = g.group(1)
-                if re.search(r'Contact', ln, re.IGNORECASE) or re.search(r'\+?\d{7,}', ln):
-                    buyer['contact'] = re.sub(r'Contact\s*No\.?:?\s*', '', ln, flags=re.IGNORECASE).strip()
+                if (m := _GSTIN_LINE_RE.search(ln)):
+                    buyer['gstin'] = m.group(1)
+                    continue
+                if 'contact' not in buyer and (m := _CONTACT_LINE_RE.search(ln)):
+                    buyer['contact'] = m.group(1)
     else:
         # Fallback: find 'GSTIN Number:' block (second GSTIN is usually buyer)
-        all_gstins = re.findall(r"GSTIN.*?([A-Z0-9]{15})", full_text_str, re.IGNORECASE)
+        all_gstins = _GSTIN_LINE_RE.findall(full_text_str)
         if len(all_gstins) > 1:
             buyer['gstin'] = all_gstins[1]
     
@@ -233,7 +278,7 @@ def extract_line_items(full_text_str: str) -> List[Dict[str, Any]]:
     table_match = re.search(
         r"#\s*Item\s*name.*?(?:Invoice\s*Amount\s*In\s*Words|Total\s+₹|Sub\s*Total)",
         full_text_str,
-        flags=re.IGNORECASE | re.DOTALL
+        flags=_ICD
     )
     
     if not table_match:
@@ -241,7 +286,7 @@ def extract_line_items(full_text_str: str) -> List[Dict[str, Any]]:
         table_match = re.search(
             r"(?:Quantity\s*Unit\s*Price|Description\s*of\s*Goods).*?(?:Invoice\s*Amount\s*In\s*Words|Total\s+₹|Sub\s*Total)",
             full_text_str,
-            flags=re.IGNORECASE | re.DOTALL
+            flags=_ICD
         )
     
     if not table_match:
@@ -294,19 +339,11 @@ def extract_line_items(full_text_str: str) -> List[Dict[str, Any]]:
     if row:
         items.append(row)
     
-    # Post-normalize common fields & convert strings to numbers
+    # Amounts are already floats (normalize_amount above); default GST to 18%
+    # and split it evenly into CGST/SGST
     for it in items:
-        if 'unitPrice' in it and isinstance(it['unitPrice'], str):
-            it['unitPrice'] = normalize_amount(it['unitPrice'])
-        if 'taxableValue' in it and isinstance(it['taxableValue'], str):
-            it['taxableValue'] = normalize_amount(it['taxableValue'])
-        # Set default GST rate if missing
-        if 'gstRate' not in it:
-            it['gstRate'] = 18.0  # Default 18%
-        # Split GST into CGST/SGST
-        if 'gstRate' in it:
-            it['cgstRatePct'] = it['gstRate'] / 2
-            it['sgstRatePct'] = it['gstRate'] / 2
+        half = it.setdefault('gstRate', 18.0) * 0.5
+        it['cgstRatePct'] = it['sgstRatePct'] = half
     
     return items
 
@@ -319,12 +356,7 @@ def extract_items(ocr_response: Dict) -> List[Dict[str, Any]]:
     items = []
     
     # Build a map of descriptions to find better matches
-    description_map = {}
-    for token in full_text:
-        text = token.get('text', '')
-        # Look for product codes/names
-        if re.match(r'^[A-Z0-9\s\.]+$', text) and len(text) > 3 and len(text) < 30:
-            description_map[text] = token
+    description_map = {t['text']: t for t in full_text if _DESC_RE.match(t.get('text', ''))}
     
     for idx, line in enumerate(lines):
         desc = line.get('description', {}).get('value', '') or ''
@@ -381,36 +413,37 @@ def extract_items(ocr_response: Dict) -> List[Dict[str, Any]]:
 def extract_totals_from_text(full_text_str: str) -> Dict[str, Any]:
     """Extract totals using flexible patterns."""
     totals = {}
+    fields = scan_fields(_TOTALS_FIELDS_RE, full_text_str)
     
     # Sub Total
-    sub_total = regex_get(r"Sub\s*Total\s*₹?\s*([0-9\.,]+)", full_text_str)
-    totals['subTotal'] = normalize_amount(sub_total) if sub_total else None
+    sub_total = fields.get('subTotal')
+    totals['subTotal'] = _to_amount(sub_total) if sub_total else None
     
     # SGST
-    sgst = regex_get(r"SGST@[\d\.]*%?\s*₹?\s*([0-9\.,]+)", full_text_str)
-    totals['sgst'] = normalize_amount(sgst) if sgst else None
+    sgst = fields.get('sgst')
+    totals['sgst'] = _to_amount(sgst) if sgst else None
     
     # CGST
-    cgst = regex_get(r"CGST@[\d\.]*%?\s*₹?\s*([0-9\.,]+)", full_text_str)
-    totals['cgst'] = normalize_amount(cgst) if cgst else None
+    cgst = fields.get('cgst')
+    totals['cgst'] = _to_amount(cgst) if cgst else None
     
     # Round off (can be negative)
-    round_off = regex_get(r"Round\s*[Oo]ff\s*[-]?\s*₹?\s*([0-9\.,\-]+)", full_text_str)
-    totals['roundOff'] = normalize_amount(round_off) if round_off else 0.0
+    round_off = fields.get('roundOff')
+    totals['roundOff'] = _to_amount(round_off) if round_off else 0.0
     
     # Total amount
-    total = regex_get(r"Total\s*₹\s*([0-9\.,]+)", full_text_str)
+    total = regex_get(r"Total\s*₹\s*([0-9][0-9,]*(?:\.\d+)?)", full_text_str)
     if not total:
-        total = regex_get(r"Total\s*([0-9\.,]+)", full_text_str)
-    totals['totalAmount'] = normalize_amount(total) if total else None
+        total = regex_get(r"Total\s*([0-9][0-9,]*(?:\.\d+)?)", full_text_str)
+    totals['totalAmount'] = _to_amount(total) if total else None
     
     # Total quantity
     totals['totalQty'] = regex_get(r"Total\s+([0-9]+\s*(?:PCS|Bag|BAG|KG|Nos)?)", full_text_str)
     
     # Taxable value (from sub total or explicit field)
     if not totals.get('subTotal'):
-        taxable = regex_get(r"Taxable\s*Value\s*₹?\s*([0-9\.,]+)", full_text_str)
-        totals['taxableValue'] = normalize_amount(taxable) if taxable else None
+        taxable = fields.get('taxableValue')
+        totals['taxableValue'] = _to_amount(taxable) if taxable else None
     else:
         totals['taxableValue'] = totals['subTotal']
     
@@ -424,14 +457,11 @@ def extract_totals_from_text(full_text_str: str) -> Dict[str, Any]:
     totals['totalInWords'] = regex_get(
         r"Invoice\s*Amount\s*In\s*Words(?:\s*[:\-\n])*\s*(.+?)(?:Terms\s*And\s*Conditions|Sub\s*Total|For\s*:)",
         full_text_str,
-        flags=re.IGNORECASE | re.DOTALL
+        flags=_ICD
     )
     
     # Tax in words (if present)
-    totals['taxInWords'] = regex_get(
-        r"Tax\s*Amount\s*\(in\s*words\)\s*:?\s*INR\s+([^\.]+)",
-        full_text_str
-    )
+    totals['taxInWords'] = fields.get('taxInWords')
     
     return totals
 
@@ -1,70 +1,110 @@
 import re
+import bisect
+import datetime
 import numpy as np
-from sklearn.cluster import DBSCAN
 
 
 GSTIN_RE = re.compile(r'\b[0-9]{2}[A-Z]{5}[0-9]{4}[A-Z][1-9A-Z]Z[0-9A-Z]\b')
-DATE_RE = re.compile(r'\b(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})\b', re.I)
-INV_RE = re.compile(r'\b(inv|invoice)\s*[:\-]?\s*([A-Z0-9\-\/]+)', re.I)
-PLACE_OF_SUPPLY_RE = re.compile(r'\b(place\s+of\s+supply|pos)\s*[:\-]?\s*([A-Z]{2})\b', re.I)
+_DATE_SPLIT_RE = re.compile(r'[-/]')
 
+# GSTIN, date, invoice number and place of supply as one pattern set for a
+# single pass over the joined header text. Alternatives are wrapped in a
+# lookahead so a hit never consumes text another field could start in (e.g. a
+# date right after "Invoice"), which keeps results identical to separate scans.
+_HEADER_SCAN_RE = re.compile(
+    r'(?=(?P<gstin>\b[0-9]{2}[A-Z]{5}[0-9]{4}[A-Z][1-9A-Z]Z[0-9A-Z]\b)'
+    r'|(?P<date>\b\d{1,2}[-/]\d{1,2}[-/]\d{2,4}\b)'
+    r'|\b(?:inv|invoice)\s*[:\-]?\s*(?P<inv>[A-Z0-9\-\/]+)'
+    r'|\b(?:place\s+of\s+supply|pos)\s*[:\-]?\s*(?P<pos>[A-Z]{2})\b)',
+    re.I
+)
 
-def _get_bbox_center(bbox):
-    """Get center point of bounding box."""
-    if not bbox:
-        return None
-    xs = [p[0] for p in bbox]
-    ys = [p[1] for p in bbox]
-    return (sum(xs) / len(xs), sum(ys) / len(ys))
+# Label tokens that are never part of an address
+_ADDRESS_SKIP_LABELS = frozenset({"seller", "buyer", "bill to", "ship to", "from", "to"})
+
+# Token count above which seller/buyer separation falls back to DBSCAN
+_DBSCAN_MIN_TOKENS = 200
+
+# Totals label patterns, in priority order per key; each is followed by the amount
+_TOTALS_LABELS = {
+    "taxable": [r'taxable\s*(?:value|amount)?\s*[:\-]?\s*[₹rs.]?\s*', r'total\s*before\s*tax\s*[:\-]?\s*[₹rs.]?\s*'],
+    "tax": [r'total\s*tax\s*[:\-]?\s*[₹rs.]?\s*', r'gst\s*total\s*[:\-]?\s*[₹rs.]?\s*'],
+    "gross": [r'grand\s*total\s*[:\-]?\s*[₹rs.]?\s*', r'total\s*[:\-]?\s*[₹rs.]?\s*[₹rs.]?\s*'],
+    "round_off": [r'round\s*(?:off|round)\s*[:\-]?\s*[₹rs.]?\s*'],
+    "cgst": [r'cgst\s*[:\-]?\s*[₹rs.]?\s*'],
+    "sgst": [r'sgst\s*[:\-]?\s*[₹rs.]?\s*'],
+    "igst": [r'igst\s*[:\-]?\s*[₹rs.]?\s*'],
+}
+# All totals patterns as one pattern set: every alternative is wrapped in a
+# lookahead and tagged with a "<key>_<priority>" group, so a single finditer
+# reports the first hit of every pattern.
+_TOTALS_SCAN_RE = re.compile(
+    "(?=" + "|".join(
+        rf"{label}(?P<{key}_{i}>[\d,]+\.?\d*)"
+        for key, labels in _TOTALS_LABELS.items()
+        for i, label in enumerate(labels)
+    ) + ")",
+    re.I
+)
 
 
 def _cluster_tokens_by_position(tokens, n_clusters=2):
-    """Cluster tokens by spatial position to separate seller/buyer blocks."""
-    centers = []
-    for t in tokens:
-        center = _get_bbox_center(t.get("bbox"))
-        if center:
-            centers.append(center)
-    
-    if len(centers) < 2:
+    """Cluster tokens by spatial position to separate seller/buyer blocks.
+    
+    Small pages use an O(n) left/right split at the median x-center; DBSCAN
+    is only worth its fit cost on large token sets.
+    """
+    boxes = [t["bbox"] for t in tokens if t.get("bbox")]
+    if len(boxes) < 2:
         return [0] * len(tokens)
     
-    X = np.array(centers)
-    clustering = DBSCAN(eps=200, min_samples=2).fit(X)
-    return clustering.labels_
+    # (N, 4, 2) quad corners -> (N, 2) centers in one reduction
+    centers = np.asarray(boxes, dtype=np.float32).mean(axis=1)
+    
+    if len(tokens) > _DBSCAN_MIN_TOKENS:
+        from sklearn.cluster import DBSCAN
+        clustering = DBSCAN(eps=200, min_samples=2).fit(centers)
+        return clustering.labels_
+    
+    xs = centers[:, 0]
+    return (xs > np.median(xs)).astype(np.int8)
 
 
 def parse_header_blocks(tokens, image_bgr):
     """Parse header fields: seller, buyer, invoice number, date, place of supply."""
     texts = [t["text"] for t in tokens]
+    texts_upper = [t.get("text_upper") or t["text"].upper() for t in tokens]
     joined = " | ".join(texts)
     
     # Store all tokens for full text extraction
     all_tokens = tokens
     
-    # Extract GSTINs
-    gstins = GSTIN_RE.findall(joined.upper())
-    
-    # Extract dates
-    dates = DATE_RE.findall(joined)
-    date_match = dates[0] if dates else None
-    
-    # Extract invoice number
-    inv_match = INV_RE.search(joined, re.I)
-    inv_number = inv_match.group(2) if inv_match else None
-    inv_bbox = None
-    inv_conf = 0.0
-    if inv_match:
-        # Find token containing invoice number
-        for t in tokens:
-            if inv_match.group(2).upper() in t["text"].upper():
-                inv_bbox = t.get("bbox")
-                inv_conf = t.get("conf", 0.7)
-                break
+    # Start offset of each token in `joined`, to map GSTIN hits back to tokens
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text) + 3
     
-    # Extract place of supply
-    pos_match = PLACE_OF_SUPPLY_RE.search(joined, re.I)
-    place_of_supply = pos_match.group(2) if pos_match else None
+    # One pass for all header fields: every GSTIN (remembering the first token
+    # each one appears in), and the first date, invoice number and place of supply
+    gstins = []
+    gstin_token_idx = {}
+    date_match = None
+    inv_number = None
+    place_of_supply = None
+    for m in _HEADER_SCAN_RE.finditer(joined):
+        kind = m.lastgroup
+        if kind == "gstin":
+            g = m.group(kind).upper()
+            gstins.append(g)
+            gstin_token_idx.setdefault(g, bisect.bisect_right(starts, m.start(kind)) - 1)
+        elif kind == "date":
+            date_match = date_match or m.group(kind)
+        elif kind == "inv":
+            inv_number = inv_number or m.group(kind)
+        else:
+            place_of_supply = place_of_supply or m.group(kind)
     
     # Cluster tokens to separate seller/buyer
     clusters = _cluster_tokens_by_position(tokens)
@@ -94,26 +134,27 @@ def parse_header_blocks(tokens, image_bgr):
     buyer_gstin_bbox = None
     
     if gstins:
-        for t in tokens:
-            if gstins[0] in t["text"].upper():
-                seller_gstin_bbox = t.get("bbox")
-                break
+        seller_gstin_bbox = tokens[gstin_token_idx[gstins[0]]].get("bbox")
     
     if len(gstins) > 1:
-        for t in tokens:
-            if gstins[1] in t["text"].upper():
-                buyer_gstin_bbox = t.get("bbox")
-                break
+        buyer_gstin_bbox = tokens[gstin_token_idx[gstins[1]]].get("bbox")
     
-    # Find date bbox
-    date_bbox = None
-    date_conf = 0.0
-    if date_match:
-        for t in tokens:
-            if date_match[0] in t["text"]:
-                date_bbox = t.get("bbox")
-                date_conf = t.get("conf", 0.7)
-                break
+    # Find the tokens holding the invoice number and date in a single pass
+    inv_needle = inv_number.upper() if inv_number else None
+    inv_idx = None
+    date_idx = None
+    for i, (text, text_upper) in enumerate(zip(texts, texts_upper)):
+        if inv_idx is None and inv_needle and inv_needle in text_upper:
+            inv_idx = i
+        if date_idx is None and date_match and date_match in text:
+            date_idx = i
+        if (inv_idx is not None or not inv_needle) and (date_idx is not None or not date_match):
+            break
+    
+    inv_bbox = tokens[inv_idx].get("bbox") if inv_idx is not None else None
+    inv_conf = tokens[inv_idx].get("conf", 0.7) if inv_idx is not None else 0.0
+    date_bbox = tokens[date_idx].get("bbox") if date_idx is not None else None
+    date_conf = tokens[date_idx].get("conf", 0.7) if date_idx is not None else 0.0
     
     # Extract seller and buyer addresses (tokens near their names/GSTINs)
     seller_address = _extract_address_near_entity(seller_tokens, seller_name, gstins[0] if gstins else None)
@@ -142,9 +183,9 @@ def parse_header_blocks(tokens, image_bgr):
                 "alt": []
             },
             "date": {
-                "value": _normalize_date(date_match[0]) if date_match else None,
+                "value": _normalize_date(date_match) if date_match else None,
                 "confidence": date_conf,
-                "raw": date_match[0] if date_match else None
+                "raw": date_match
             },
             "placeOfSupply": place_of_supply
         },
@@ -164,10 +205,10 @@ def _extract_address_near_entity(entity_tokens, entity_name, gstin):
         # Skip if it's the entity name or GSTIN
         if entity_name and text == entity_name:
             continue
-        if gstin and gstin in text.upper():
+        if gstin and gstin in (t.get("text_upper") or text.upper()):
             continue
         # Skip common labels
-        if text.lower() in ["seller", "buyer", "bill to", "ship to", "from", "to"]:
+        if (t.get("text_lower") or text.lower()).strip() in _ADDRESS_SKIP_LABELS:
             continue
         if text:
             address_parts.append(text)
@@ -176,15 +217,25 @@ def _extract_address_near_entity(entity_tokens, entity_name, gstin):
 
 
 def _normalize_date(date_str):
-    """Normalize date string to YYYY-MM-DD format."""
-    import datetime
-    for fmt in ["%d/%m/%Y", "%d-%m-%Y", "%d/%m/%y", "%d-%m-%y"]:
-        try:
-            dt = datetime.datetime.strptime(date_str, fmt)
-            return dt.strftime("%Y-%m-%d")
-        except:
-            continue
-    return date_str
+    """Normalize date string (DD/MM/YYYY, DD-MM-YY, ...) to YYYY-MM-DD format."""
+    parts = _DATE_SPLIT_RE.split(date_str)
+    if len(parts) != 3 or ("/" in date_str and "-" in date_str):
+        return date_str
+    d, m, y = parts
+    if not (d.isdigit() and m.isdigit() and y.isdigit()) or len(d) > 2 or len(m) > 2:
+        return date_str
+    if len(y) == 4:
+        year = int(y)
+    elif len(y) == 2:
+        # Same pivot as strptime's %y: 69-99 -> 19xx, 00-68 -> 20xx
+        year = int(y)
+        year += 1900 if year >= 69 else 2000
+    else:
+        return date_str
+    try:
+        return datetime.date(year, int(m), int(d)).strftime("%Y-%m-%d")
+    except ValueError:
+        return date_str
 
 
 def extract_totals_from_tokens(tokens, image_bgr):
@@ -192,44 +243,25 @@ def extract_totals_from_tokens(tokens, image_bgr):
     Extract totals (net, tax, gross, round-off) from tokens.
     Typically found at the bottom of invoices.
     """
-    import re
-    
     totals = {}
-    texts = [t["text"] for t in tokens]
-    joined = " ".join(texts).lower()
-    
-    # Patterns for totals
-    patterns = {
-        "taxable": [r'taxable\s*(?:value|amount)?\s*[:\-]?\s*[₹rs.]?\s*([\d,]+\.?\d*)', r'total\s*before\s*tax\s*[:\-]?\s*[₹rs.]?\s*([\d,]+\.?\d*)'],
-        "tax": [r'total\s*tax\s*[:\-]?\s*[₹rs.]?\s*([\d,]+\.?\d*)', r'gst\s*total\s*[:\-]?\s*[₹rs.]?\s*([\d,]+\.?\d*)'],
-        "gross": [r'grand\s*total\s*[:\-]?\s*[₹rs.]?\s*([\d,]+\.?\d*)', r'total\s*[:\-]?\s*[₹rs.]?\s*[₹rs.]?\s*([\d,]+\.?\d*)'],
-        "round_off": [r'round\s*(?:off|round)\s*[:\-]?\s*[₹rs.]?\s*([\d,]+\.?\d*)']
-    }
+    # Patterns are case-insensitive, so the joined text is not lower-cased
+    joined = " ".join(t["text"] for t in tokens)
+    
+    # One pass over the text collecting the first hit of each pattern
+    hits = {}
+    for m in _TOTALS_SCAN_RE.finditer(joined):
+        hits.setdefault(m.lastgroup, m.group(m.lastgroup))
     
-    for key, pattern_list in patterns.items():
-        for pattern in pattern_list:
-            match = re.search(pattern, joined, re.I)
-            if match:
-                try:
-                    val_str = match.group(1).replace(",", "").replace("₹", "").replace("Rs.", "").replace("rs.", "").strip()
-                    totals[key] = float(val_str)
-                    break
-                except:
-                    continue
-    
-    # Look for CGST/SGST/IGST
-    cgst_pattern = r'cgst\s*[:\-]?\s*[₹rs.]?\s*([\d,]+\.?\d*)'
-    sgst_pattern = r'sgst\s*[:\-]?\s*[₹rs.]?\s*([\d,]+\.?\d*)'
-    igst_pattern = r'igst\s*[:\-]?\s*[₹rs.]?\s*([\d,]+\.?\d*)'
-    
-    for pattern, key in [(cgst_pattern, "cgst"), (sgst_pattern, "sgst"), (igst_pattern, "igst")]:
-        match = re.search(pattern, joined, re.I)
-        if match:
+    # Per key, take the first pattern (in priority order) whose amount parses
+    for key, labels in _TOTALS_LABELS.items():
+        for i in range(len(labels)):
+            val_str = hits.get(f"{key}_{i}")
+            if val_str is None:
+                continue
             try:
-                val_str = match.group(1).replace(",", "").replace("₹", "").replace("Rs.", "").replace("rs.", "").strip()
-                totals[key] = float(val_str)
-            except:
+                totals[key] = float(val_str.replace(",", ""))
+                break
+            except ValueError:
                 continue
     
     return totals
-
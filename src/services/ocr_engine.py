@@ -1,7 +1,11 @@
-from paddleocr import PaddleOCR
 import sys
 import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import cv2
+import numpy as np
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 import config
@@ -9,12 +13,15 @@ import config
 
 _OCR = None
 _STRUCTURE_OCR = None
+_POOL = None
+_WARMUP = None
 
 
 def get_ocr():
     """Get or initialize PaddleOCR instance (singleton)."""
     global _OCR
     if _OCR is None:
+        from paddleocr import PaddleOCR
         _OCR = PaddleOCR(
             use_angle_cls=True,
             lang=config.OCR_LANG,
@@ -25,6 +32,83 @@ def get_ocr():
     return _OCR
 
 
+def _get_pool():
+    """Get or start the OCR worker pool (one PaddleOCR instance per process)."""
+    global _POOL, _WARMUP
+    if _POOL is None:
+        # spawn, not fork: Paddle/CUDA state does not survive a fork
+        _POOL = ProcessPoolExecutor(
+            max_workers=config.OCR_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=get_ocr
+        )
+        # Workers (and their get_ocr initializer) only start on the first
+        # submit; the warm-up task starts one and finishes once its model
+        # is loaded, or fails if the initializer does
+        _WARMUP = _POOL.submit(_worker_ping)
+    return _POOL
+
+
+def _reset_pool(pool):
+    """Drop a broken pool so the next _get_pool starts a fresh one."""
+    global _POOL
+    # Another caller may already have replaced it
+    if _POOL is pool:
+        _POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _run_in_pool(fn, *args):
+    """Run fn in the worker pool, restarting the pool once if a worker died."""
+    pool = _get_pool()
+    try:
+        return pool.submit(fn, *args).result()
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        return _get_pool().submit(fn, *args).result()
+
+
+async def _run_in_pool_async(fn, *args):
+    """Await fn in the worker pool, restarting the pool once if a worker died."""
+    pool = _get_pool()
+    try:
+        return await asyncio.wrap_future(pool.submit(fn, *args))
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        return await asyncio.wrap_future(_get_pool().submit(fn, *args))
+
+
+def start_pool():
+    """Start the OCR worker pool and its warm-up task (no-op with OCR_WORKERS = 0)."""
+    if config.OCR_WORKERS > 0:
+        _get_pool()
+
+
+def _worker_ping():
+    """Pool task that returns once the worker's initializer has loaded PaddleOCR."""
+    return True
+
+
+def _worker_ocr_tokens(image_bgr):
+    """Pool task: OCR an image with the worker's own PaddleOCR instance."""
+    return ocr_tokens(get_ocr(), image_bgr)
+
+
+def _recognize_crops(crops):
+    """Recognize a batch of crops (no detection); returns (text, score) per crop."""
+    # A nested list makes PaddleOCR feed the crops to the recognizer as a
+    # single batch (det must be off for list input)
+    return get_ocr().ocr([crops], det=False, cls=True)[0]
+
+
+def models_loaded():
+    """Whether OCR is ready: the pool's warm-up task succeeded with OCR_WORKERS > 0, else this process's PaddleOCR."""
+    if config.OCR_WORKERS > 0:
+        _get_pool()
+        return _WARMUP.done() and _WARMUP.exception() is None
+    return get_ocr() is not None
+
+
 def get_structure_ocr():
     """Get or initialize PP-Structure OCR for table detection."""
     global _STRUCTURE_OCR
@@ -44,6 +128,19 @@ def get_structure_ocr():
     return _STRUCTURE_OCR
 
 
+async def ocr_tokens_async(image_bgr):
+    """OCR an image for an async endpoint.
+    
+    With OCR_WORKERS > 0 the image goes to the worker pool and the future is
+    awaited, so the event loop is not blocked while the page is recognized and
+    this process never builds its own PaddleOCR. Otherwise OCR runs in this
+    process, as ocr_tokens does.
+    """
+    if config.OCR_WORKERS > 0:
+        return await _run_in_pool_async(_worker_ocr_tokens, image_bgr)
+    return ocr_tokens(get_ocr(), image_bgr)
+
+
 def ocr_tokens(ocr, image_bgr):
     """Run OCR on image and return tokens with text, confidence, and bounding box."""
     result = ocr.ocr(image_bgr, cls=True)
@@ -61,15 +158,32 @@ def ocr_tokens(ocr, image_bgr):
         from src.services.handwriting_detector import enhance_token_with_handwriting_detection
         tokens = [enhance_token_with_handwriting_detection(t, image_bgr) for t in tokens]
     
+    # Case-folded text, computed once for the downstream parsers
+    for t in tokens:
+        t["text_lower"] = t["text"].lower()
+        t["text_upper"] = t["text"].upper()
+    
     return tokens
 
 
-def extract_table_with_structure(image_bgr):
+def extract_table_with_structure(image_bgr, tokens=None):
     """
     Extract table using PP-Structure.
     
+    Cell text is assembled from the page-level OCR `tokens` whose centers fall
+    inside each cell; cells no token lands in are recognized in one batch.
+    With OCR_WORKERS > 0 the whole extraction runs in an OCR worker, so this
+    process builds neither PP-Structure nor PaddleOCR.
+    
     Returns structured table data with cells and their OCR results.
     """
+    if config.OCR_WORKERS > 0:
+        return _run_in_pool(_structure_tables, image_bgr, tokens)
+    return _structure_tables(image_bgr, tokens)
+
+
+def _structure_tables(image_bgr, tokens):
+    """PP-Structure table extraction with this process's models (see extract_table_with_structure)."""
     structure_ocr = get_structure_ocr()
     if structure_ocr is None:
         return None
@@ -77,8 +191,16 @@ def extract_table_with_structure(image_bgr):
     try:
         result = structure_ocr(image_bgr)
         
+        # Token centers for cell assignment
+        tokens = [t for t in (tokens or []) if t.get("bbox")]
+        if tokens:
+            centers = np.asarray([t["bbox"] for t in tokens], dtype=np.float32).mean(axis=1)
+            cx, cy = centers[:, 0], centers[:, 1]
+        
         # Parse PP-Structure output
         tables = []
+        all_cells = []  # (cell, crop) for every cell, for the handwriting pass
+        pending = []    # (cell, crop) for cells no page token landed in
         for item in result:
             if item.get('type') == 'table':
                 table_data = {
@@ -90,43 +212,44 @@ def extract_table_with_structure(image_bgr):
                 # Extract cell-level OCR
                 cell_boxes = item.get('res', {}).get('cell_bbox', [])
                 for cell_box in cell_boxes:
-                    # Run OCR on each cell
                     x1, y1, x2, y2 = map(int, cell_box[:4])
                     cell_crop = image_bgr[y1:y2, x1:x2]
                     
                     if cell_crop.size > 0:
-                        ocr = get_ocr()
-                        cell_result = ocr.ocr(cell_crop, cls=True)
-                        
-                        cell_text = ""
-                        cell_conf = 0.0
-                        if cell_result and cell_result[0]:
-                            texts = []
-                            confs = []
-                            for box, (text, score) in cell_result[0]:
-                                texts.append(text)
-                                confs.append(score)
-                            cell_text = " ".join(texts)
-                            cell_conf = sum(confs) / len(confs) if confs else 0.0
+                        cell = {'bbox': [x1, y1, x2, y2], 'text': "", 'conf': 0.0}
                         
-                        # Check for handwriting in cell
-                        if config.ENABLE_HANDWRITING_DETECTION and cell_text:
-                            from src.services.handwriting_detector import is_handwritten, ocr_with_trocr
-                            hw_score = is_handwritten(cell_crop)
-                            if hw_score > config.HANDWRITING_THRESHOLD:
-                                trocr_text, trocr_conf = ocr_with_trocr(cell_crop)
-                                if trocr_text and trocr_conf > cell_conf:
-                                    cell_text = trocr_text
-                                    cell_conf = trocr_conf
+                        idx = np.flatnonzero((cx >= x1) & (cx < x2) & (cy >= y1) & (cy < y2)) if tokens else []
+                        if len(idx):
+                            cell['text'] = " ".join(tokens[i]["text"] for i in idx)
+                            cell['conf'] = float(np.mean([tokens[i].get("conf", 0.0) for i in idx]))
+                        else:
+                            pending.append((cell, cell_crop))
                         
-                        table_data['cells'].append({
-                            'bbox': [x1, y1, x2, y2],
-                            'text': cell_text,
-                            'conf': cell_conf
-                        })
+                        table_data['cells'].append(cell)
+                        all_cells.append((cell, cell_crop))
                 
                 tables.append(table_data)
         
+        # Recognize all token-less cells in one batched call
+        if pending:
+            rec_res = _recognize_crops([crop for _, crop in pending])
+            for (cell, _), (text, score) in zip(pending, rec_res):
+                cell['text'] = text
+                cell['conf'] = float(score)
+        
+        # Check for handwriting in cells, re-OCR'ing the hits with one TrOCR batch
+        if config.ENABLE_HANDWRITING_DETECTION:
+            from src.services.handwriting_detector import is_handwritten, ocr_with_trocr_batch
+            hw_cells = [
+                (cell, crop) for cell, crop in all_cells
+                if cell['text'] and is_handwritten(crop) > config.HANDWRITING_THRESHOLD
+            ]
+            trocr_results = ocr_with_trocr_batch([crop for _, crop in hw_cells])
+            for (cell, _), (trocr_text, trocr_conf) in zip(hw_cells, trocr_results):
+                if trocr_text and trocr_conf > cell['conf']:
+                    cell['text'] = trocr_text
+                    cell['conf'] = trocr_conf
+        
         return tables
     except Exception as e:
         print(f"PP-Structure extraction failed: {e}")
@@ -1,17 +1,16 @@
-from .reconcile import recompute_and_summarize, reconcile_totals, split_tax_breakdown
+import numpy as np
+
+from .reconcile import recompute_and_summarize, reconcile_totals, split_tax
 from ..utils.hashing import sha256_bytes, perceptual_hash
 from ..schemas import MetaInfo, QualityMetrics, TotalsInfo, Warning
 
 
 def avg_conf(rows):
     """Calculate average confidence across all fields in rows."""
-    vals = []
+    total = 0.0
     for r in rows:
-        for field_name in ["description", "qty", "unitPrice", "gstRate"]:
-            field = getattr(r, field_name, None)
-            if field and hasattr(field, "confidence"):
-                vals.append(field.confidence)
-    return round(sum(vals) / len(vals), 3) if vals else 0.0
+        total += r.description.confidence + r.qty.confidence + r.unitPrice.confidence + r.gstRate.confidence
+    return round(total / (4 * len(rows)), 3) if rows else 0.0
 
 
 def generate_warnings(header, rows, quality):
@@ -32,23 +31,60 @@ def generate_warnings(header, rows, quality):
             score=header.get("invoice", {}).get("number", {}).get("confidence", 0.0)
         ))
     
-    for i, row in enumerate(rows):
-        if row.qty.confidence < 0.6:
+    # Low-confidence rows found in one vectorized comparison; warnings stay
+    # in row order, qty before unitPrice
+    qty_conf = np.fromiter((r.qty.confidence for r in rows), dtype=np.float64, count=len(rows))
+    price_conf = np.fromiter((r.unitPrice.confidence for r in rows), dtype=np.float64, count=len(rows))
+    low_qty = qty_conf < 0.6
+    low_price = price_conf < 0.6
+    for i in np.flatnonzero(low_qty | low_price):
+        if low_qty[i]:
             warnings.append(Warning(
                 code="LOW_CONF_FIELD",
                 field=f"lines[{i}].qty",
-                score=row.qty.confidence
+                score=float(qty_conf[i])
             ))
-        if row.unitPrice.confidence < 0.6:
+        if low_price[i]:
             warnings.append(Warning(
                 code="LOW_CONF_FIELD",
                 field=f"lines[{i}].unitPrice",
-                score=row.unitPrice.confidence
+                score=float(price_conf[i])
             ))
     
     return warnings
 
 
+def _finalize_totals(computed, extracted, place_of_supply, reconciled, round_off):
+    """Build the response TotalsInfo from computed and extracted totals."""
+    # Use extracted totals if available (from page 2), otherwise use computed
+    # Extracted totals are more accurate as they come directly from the document
+    if extracted:
+        net = extracted.get("net", computed["net"])
+        tax = extracted.get("tax", computed["tax"])
+        gross = extracted.get("gross", computed["gross"])
+    else:
+        net, tax, gross = computed["net"], computed["tax"], computed["gross"]
+    
+    if extracted and any(k in extracted for k in ("cgst", "sgst", "igst")):
+        cgst = extracted.get("cgst", 0.0)
+        sgst = extracted.get("sgst", 0.0)
+        igst = extracted.get("igst", 0.0)
+    else:
+        cgst, sgst, igst = split_tax(tax, place_of_supply)
+    
+    return TotalsInfo(
+        net=net,
+        tax=tax,
+        gross=gross,
+        cgst=cgst,
+        sgst=sgst,
+        igst=igst,
+        confidence=0.8,
+        reconciled=reconciled,
+        roundOffDelta=round_off
+    )
+
+
 def build_response(header, table, quality, hashes, raw_bytes=None, image_bgr=None, extracted_totals=None):
     """Build the final OCR response."""
     rows = table.get("rows", [])
@@ -60,27 +96,6 @@ def build_response(header, table, quality, hashes, raw_bytes=None, image_bgr=Non
     if extracted_totals and "taxable" in extracted_totals:
         extracted_totals["net"] = extracted_totals["taxable"]
     
-    # Use extracted totals if available (from page 2), otherwise use computed
-    # Extracted totals are more accurate as they come directly from the document
-    if extracted_totals:
-        totals_dict = {
-            "net": extracted_totals.get("net", computed_totals["net"]),
-            "tax": extracted_totals.get("tax", computed_totals["tax"]),
-            "gross": extracted_totals.get("gross", computed_totals["gross"]),
-            "cgst": extracted_totals.get("cgst", 0.0),
-            "sgst": extracted_totals.get("sgst", 0.0),
-            "igst": extracted_totals.get("igst", 0.0)
-        }
-        
-        # If tax breakdown not in extracted, split from total tax
-        if not any(k in extracted_totals for k in ["cgst", "sgst", "igst"]):
-            place_of_supply = header.get("invoice", {}).get("placeOfSupply")
-            totals_dict = split_tax_breakdown(totals_dict, place_of_supply)
-    else:
-        # No extracted totals, use computed and split tax
-        place_of_supply = header.get("invoice", {}).get("placeOfSupply")
-        totals_dict = split_tax_breakdown(computed_totals, place_of_supply)
-    
     # Reconcile: compare computed vs extracted to find discrepancies
     reconciled, round_off = reconcile_totals(computed_totals, extracted_totals or {})
     
@@ -88,17 +103,12 @@ def build_response(header, table, quality, hashes, raw_bytes=None, image_bgr=Non
     if extracted_totals and "round_off" in extracted_totals:
         round_off = extracted_totals["round_off"]
     
-    # Build totals info
-    totals_info = TotalsInfo(
-        net=totals_dict.get("net", 0.0),
-        tax=totals_dict.get("tax", 0.0),
-        gross=totals_dict.get("gross", 0.0),
-        cgst=totals_dict.get("cgst", 0.0),
-        sgst=totals_dict.get("sgst", 0.0),
-        igst=totals_dict.get("igst", 0.0),
-        confidence=0.8,
-        reconciled=reconciled,
-        roundOffDelta=round_off
+    totals_info = _finalize_totals(
+        computed_totals,
+        extracted_totals,
+        header.get("invoice", {}).get("placeOfSupply"),
+        reconciled,
+        round_off
     )
     
     # Build meta info
@@ -161,17 +171,6 @@ def build_response(header, table, quality, hashes, raw_bytes=None, image_bgr=Non
         placeOfSupply=invoice_data.get("placeOfSupply")
     ) if invoice_data else None
     
-    # Convert Pydantic models to dicts for validation
-    def to_dict(obj):
-        """Convert Pydantic model to dict."""
-        if obj is None:
-            return None
-        if hasattr(obj, 'model_dump'):
-            return obj.model_dump()
-        elif hasattr(obj, '__dict__'):
-            return obj.__dict__
-        return obj
-    
     # Extract full text from all tokens
     from ..schemas import FullTextToken
     all_tokens = header.get("allTokens", [])
@@ -186,13 +185,12 @@ def build_response(header, table, quality, hashes, raw_bytes=None, image_bgr=Non
         ))
     
     return {
-        "meta": to_dict(meta),
-        "seller": to_dict(seller),
-        "buyer": to_dict(buyer),
-        "invoice": to_dict(invoice),
-        "lines": [to_dict(r) for r in rows],
-        "totals": to_dict(totals_info),
-        "warnings": [to_dict(w) for w in warnings],
-        "fullText": [to_dict(t) for t in full_text_tokens]
+        "meta": meta.model_dump(),
+        "seller": seller.model_dump() if seller else None,
+        "buyer": buyer.model_dump() if buyer else None,
+        "invoice": invoice.model_dump() if invoice else None,
+        "lines": [r.model_dump() for r in rows],
+        "totals": totals_info.model_dump(),
+        "warnings": [w.model_dump() for w in warnings],
+        "fullText": [t.model_dump() for t in full_text_tokens]
     }
-
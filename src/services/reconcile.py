@@ -1,9 +1,30 @@
+import re
+import numpy as np
+
+
 GST_ALLOWED = {0, 0.05, 0.12, 0.18, 0.28}
 
+# All special-line keywords in one alternation ("disc" also covers "discount");
+# when a token hits several kinds, the earlier kind in the priority list wins
+_SPECIAL_LINE_RE = re.compile(
+    r"(?P<discount>disc)|(?P<round_off>round[ \-]?off)|(?P<freight>freight|transport|shipping)",
+    re.I
+)
+_SPECIAL_LINE_PRIORITY = ("discount", "round_off", "freight")
+
 
 def compute_line_totals(qty, rate, gst):
     """Compute net, tax, and gross for a line item."""
-    net = round(qty * rate, 2)
+    return _round_line_totals(qty * rate, gst)
+
+
+def _round_line_totals(amount, gst):
+    """Net, tax, and gross for an unrounded qty * rate amount.
+    
+    The one rounding rule for line totals. Python's round, not np.round:
+    they disagree by a paisa on some halves (e.g. 33 x 2657.3 at 5%).
+    """
+    net = round(amount, 2)
     tax = round(net * gst, 2)
     gross = round(net + tax, 2)
     return net, tax, gross
@@ -25,7 +46,7 @@ def recompute_and_summarize(rows):
         price_val = float(r.unitPrice.value) if r.unitPrice.value else 0.0
         gst_val = float(r.gstRate.value) if r.gstRate.value else 0.0
         
-        n, t, g = compute_line_totals(qty_val, price_val, gst_val)
+        n, t, g = _round_line_totals(qty_val * price_val, gst_val)
         
         # Update line computed totals
         r.computed.net = n
@@ -64,34 +85,22 @@ def detect_special_lines(tokens, image_bgr):
     special_lines = []
     
     for t in tokens:
-        text_lower = t["text"].lower()
-        if any(keyword in text_lower for keyword in ["discount", "disc"]):
-            special_lines.append({"type": "discount", "token": t})
-        elif any(keyword in text_lower for keyword in ["round off", "roundoff", "round-off"]):
-            special_lines.append({"type": "round_off", "token": t})
-        elif any(keyword in text_lower for keyword in ["freight", "transport", "shipping"]):
-            special_lines.append({"type": "freight", "token": t})
+        found = {m.lastgroup for m in _SPECIAL_LINE_RE.finditer(t["text"])}
+        if found:
+            kind = next(k for k in _SPECIAL_LINE_PRIORITY if k in found)
+            special_lines.append({"type": kind, "token": t})
     
     return special_lines
 
 
-def split_tax_breakdown(totals, place_of_supply):
-    """Split tax into CGST/SGST or IGST based on place of supply."""
-    tax = totals.get("tax", 0.0)
-    
+def split_tax(tax, place_of_supply):
+    """Split tax into (cgst, sgst, igst) based on place of supply."""
     # Simplified: if same state, use CGST/SGST (50-50), else IGST
     # In practice, this should be determined from seller/buyer addresses
     if place_of_supply:
         # Assume intra-state if place of supply matches (simplified logic)
         # For now, default to IGST split
-        totals["igst"] = tax
-        totals["cgst"] = 0.0
-        totals["sgst"] = 0.0
-    else:
-        # Default to CGST/SGST split
-        totals["cgst"] = round(tax / 2, 2)
-        totals["sgst"] = round(tax / 2, 2)
-        totals["igst"] = 0.0
-    
-    return totals
-
+        return 0.0, 0.0, tax
+    # Default to CGST/SGST split
+    half = round(tax / 2, 2)
+    return half, half, 0.0
@@ -11,13 +11,94 @@ Architecture:
 6. Fallback to line-by-line parsing if header not found
 """
 import re
-from typing import List, Dict, Any, Optional
-from statistics import median
+import logging
+from operator import attrgetter
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+
+from ..utils.fields import scan_fields
+
+try:
+    # Optional JIT for the row-grouping kernel (falls back to the Python loop)
+    from numba import njit
+except ImportError:
+    njit = None
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------- 
+# Patterns (compiled once at import)
+# ----------------------- 
+_COL_AMOUNT_RE = re.compile(r"[0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]{2})")
+_COL_DECIMAL_RE = re.compile(r"\d+\.\d+")
+
+# Line heuristics
+_LINE_QTY_RE = re.compile(r"(\d{1,6})\s*(PCS|Bag|KG|Nos)?\b", re.IGNORECASE)
+_LINE_AMOUNT_RE = re.compile(r"([0-9]+\.[0-9]{2})")
+_HSN_RE = re.compile(r"\b(\d{4,8})\b")
+_LINE_GST_RE = re.compile(r"@?\s*([0-9]{1,2}(?:\.[0-9])?)\s*%")
+_MULTI_SPACE_RE = re.compile(r"\s{2,}")
+# Totals markers that end the item rows, for both the table and line parsers
+_STOP_MARKER_RE = re.compile(r"\b(?:Sub\s*Total|Total|Round Off|Amount Chargeable|Tax Amount)\b", re.IGNORECASE)
+
+# Table rows
+_QTY_UNIT_RE = re.compile(r"\bpcs\b|\bkg\b|\bbag\b|\bnos\b")
+_INTEGER_RE = re.compile(r"\b\d+\b")
+_DIGIT_RE = re.compile(r"\d")
+_COL_GST_RE = re.compile(r"\(?([0-9]{1,2}(?:\.[0-9])?)\s*%\)?")
+
+# Totals fields scanned in one pass; each alternative sits in a lookahead and
+# carries one named group. "Total" amount and qty share their anchor, so they
+# keep separate patterns.
+_TOTALS_FIELDS_RE = re.compile(
+    r"(?="
+    r"Sub\s*Total\s*[:\s]*₹?\s*(?P<subTotal>[0-9\.,-]+)"
+    r"|CGST@?[\d\.]*%?\s*[:\s]*₹?\s*(?P<cgst>[0-9\.,-]+)"
+    r"|SGST@?[\d\.]*%?\s*[:\s]*₹?\s*(?P<sgst>[0-9\.,-]+)"
+    r"|Round\s*Off\s*[:\s]*(?P<roundOff>[0-9\.\-]+)"
+    r"|(?:Amount Chargeable \(in words\)|Invoice Amount In Words)(?:[:\s\n-]*)\s*(?P<totalInWords>.+?)(?:\n|$)"
+    r"|Tax Amount \(in words\)\s*[:\s]*(?P<taxInWords>[A-Za-z0-9 ,.]+)"
+    r"|Taxable\s*Value\s*[:\s]*₹?\s*(?P<taxableValue>[0-9\.,-]+)"
+    r")",
+    re.IGNORECASE | re.DOTALL
+)
+_TOTAL_AMOUNT_RE = re.compile(r"Total\s*[:\s]*₹?\s*([0-9\.,-]+)", re.IGNORECASE)
+_TOTAL_QTY_RE = re.compile(r"Total\s+([0-9]+\s*(?:PCS|Bag|KG|Nos)?)", re.IGNORECASE)
+
+# Seller / buyer / invoice header. The top-area fields are scanned in one pass.
+_TOP_FIELDS_RE = re.compile(
+    r"(?="
+    r"(?P<sellerName>M\/s\s*[A-Za-z0-9 &\.\-]+|For\s*[:\-]?\s*[A-Za-z0-9 &\.\-]+)"
+    r"|GSTIN[^0-9A-Z]*(?P<sellerGstin>[A-Z0-9]{15})"
+    r"|Invoice\s*No\.?\s*[:\.\-]?\s*(?P<invoiceNumber>[A-Za-z0-9\/\-]+)"
+    r"|\b(?:Dated|Date)\b\s*[:\.\-]?\s*(?P<invoiceDate>[0-9]{1,2}[-\/][A-Za-z0-9]{1,3}[-\/][0-9]{2,4})"
+    r"|Place\s+of\s+Supply\s*[:\.\-]?\s*(?P<placeOfSupply>[^\n\r]+)"
+    r")",
+    re.IGNORECASE
+)
+_BUYER_BLOCK_RE = re.compile(r"(?:Bill\s*To|Buyer\s*\(Bill to\)|Buyer)[\s:\-]*\n?(.+?)(?:Invoice|HSN\/SAC|Description of Goods|Tax Invoice)", re.IGNORECASE | re.DOTALL)
+_GSTIN_CODE_RE = re.compile(r"([A-Z0-9]{15})")
+_PHONE_RE = re.compile(r"(\+?\d[\d\-\s]{6,}\d)")
+_REFERENCE_NO_RE = re.compile(r"Reference\s*No\.?\s*[:\.\-]?\s*([A-Za-z0-9\/\-]+)", re.IGNORECASE)
 
 
 # ----------------------- 
 # Utilities
 # ----------------------- 
+class _AmountChars(dict):
+    """str.translate table keeping only digits, '.' and '-' (filled in on first sight)."""
+    
+    def __missing__(self, code):
+        ch = chr(code)
+        keep = code if ch.isdecimal() or ch in ".-" else None
+        self[code] = keep
+        return keep
+
+
+_AMOUNT_CHARS = _AmountChars()
+
+
 def bbox_center(bbox):
     """Get center point of bounding box."""
     xs = [p[0] for p in bbox]
@@ -39,14 +120,45 @@ def normalize_amount(s):
     """Normalize amount string to float."""
     if s is None:
         return None
-    s = str(s).replace('₹', '').replace(',', '').strip()
-    s = re.sub(r'[^\d\.\-]', '', s)
+    # One translate pass; dropping '₹' first keeps typical input on the ASCII fast path
+    s = str(s).replace('₹', '').translate(_AMOUNT_CHARS)
+    # Only digits, '.' and '-' remain; without a digit there is nothing to parse
+    if not s.strip('.-'):
+        return None
     try:
         return round(float(s), 2)
-    except:
+    except ValueError:
         return None
 
 
+def _is_word_char(c):
+    """Same class as regex \\w."""
+    return c.isalnum() or c == "_"
+
+
+def _remove_standalone(s, word):
+    """Remove occurrences of `word` bounded by non-word characters.
+    
+    Equivalent to re.sub(r"\\b" + re.escape(word) + r"\\b", "", s) for a word
+    that starts and ends with a word character, without building a pattern.
+    """
+    parts = []
+    start = 0
+    i = s.find(word)
+    while i != -1:
+        end = i + len(word)
+        if (i == 0 or not _is_word_char(s[i - 1])) and (end == len(s) or not _is_word_char(s[end])):
+            parts.append(s[start:i])
+            start = end
+            i = s.find(word, end)
+        else:
+            i = s.find(word, i + 1)
+    if not parts:
+        return s
+    parts.append(s[start:])
+    return "".join(parts)
+
+
 def token_conf(token):
     """Extract confidence from token (handles 'conf' or 'confidence' key)."""
     return token.get("conf") or token.get("confidence") or 1.0
@@ -55,119 +167,197 @@ def token_conf(token):
 # ----------------------- 
 # Tokenize fullText (geometry-aware)
 # ----------------------- 
-def tokens_from_fulltext(fullText: List[Dict]) -> List[Dict]:
+class Token:
+    """OCR token with its geometry. Slotted: no per-instance dict."""
+    __slots__ = ("text", "text_low", "cx", "cy", "left", "bbox", "conf")
+    
+    def __init__(self, text, cx, cy, left, bbox, conf):
+        self.text = text
+        self.text_low = text.lower()
+        self.cx = cx
+        self.cy = cy
+        self.left = left
+        self.bbox = bbox
+        self.conf = conf
+    
+    def __getitem__(self, key):
+        """Mapping-style access (token["cx"]) for callers written against dict tokens."""
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+    
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+    
+    def __repr__(self):
+        return f"Token({self.text!r}, cx={self.cx}, cy={self.cy}, left={self.left})"
+
+
+_by_left = attrgetter("left")
+
+
+def tokens_from_fulltext(fullText: List[Dict]) -> List[Token]:
     """Convert OCR fullText to tokens with spatial coordinates."""
-    toks = []
+    blocks = []
     for b in fullText:
         txt = b.get("text", "").strip()
         bbox = b.get("bbox")
-        if not txt or not bbox:
-            continue
-        cx, cy = bbox_center(bbox)
-        toks.append({
-            "text": txt,
-            "cx": cx,
-            "cy": cy,
-            "left": bbox_left(bbox),
-            "bbox": bbox,
-            "conf": token_conf(b)
-        })
-    toks.sort(key=lambda t: (t["cy"], t["left"]))
-    return toks
+        if txt and bbox:
+            blocks.append((txt, bbox, b))
+    if not blocks:
+        return []
+    
+    # Centers, left edges and the (cy, left) order for all tokens at once
+    pts = np.asarray([bbox for _, bbox, _ in blocks], dtype=object)
+    if pts.ndim == 3:
+        pts = pts.astype(np.float64)
+        centers = pts.mean(axis=1)
+        cxs, cys = centers[:, 0].tolist(), centers[:, 1].tolist()
+        lefts = pts[:, :, 0].min(axis=1).tolist()
+    else:
+        # Boxes with differing point counts
+        cxs, cys = zip(*(bbox_center(bbox) for _, bbox, _ in blocks))
+        lefts = [bbox_left(bbox) for _, bbox, _ in blocks]
+    order = np.lexsort((lefts, cys))
+    
+    return [
+        Token(blocks[i][0], cxs[i], cys[i], lefts[i], blocks[i][1], token_conf(blocks[i][2]))
+        for i in order.tolist()
+    ]
 
 
 # ----------------------- 
 # Group tokens into rows
 # ----------------------- 
-def group_rows(tokens: List[Dict], y_tol=14.0) -> List[List[Dict]]:
-    """Group tokens into rows by y-proximity."""
-    rows = []
-    for t in tokens:
-        if not rows:
-            rows.append([t])
-            continue
-        med = median([x["cy"] for x in rows[-1]])
-        if abs(t["cy"] - med) <= y_tol:
-            rows[-1].append(t)
+def _row_starts(cys, y_tol):
+    """Indices of cy-sorted tokens that start a new row (running-mean test)."""
+    n = len(cys)
+    starts = np.empty(n, dtype=np.int64)
+    k = 0
+    row_sum_cy = 0.0
+    row_len = 0
+    for i in range(n):
+        cy = cys[i]
+        if row_len > 0 and abs(cy - row_sum_cy / row_len) <= y_tol:
+            row_sum_cy += cy
+            row_len += 1
         else:
-            rows.append([t])
+            starts[k] = i
+            k += 1
+            row_sum_cy = cy
+            row_len = 1
+    return starts[:k]
+
+
+# Compiled when numba is installed, else the same function as plain Python
+_row_starts_kernel = njit(cache=True)(_row_starts) if njit is not None else _row_starts
+
+
+def group_rows(tokens: List[Token], y_tol=14.0) -> List[List[Token]]:
+    """Group tokens into rows by y-proximity to the current row's mean cy."""
+    if not tokens:
+        return []
+    if njit is not None:
+        cys = np.fromiter((t.cy for t in tokens), dtype=np.float64, count=len(tokens))
+    else:
+        # Plain Python indexes a list faster than an array
+        cys = [t.cy for t in tokens]
+    bounds = _row_starts_kernel(cys, float(y_tol)).tolist() + [len(tokens)]
+    rows = [tokens[a:b] for a, b in zip(bounds, bounds[1:])]
     for r in rows:
-        r.sort(key=lambda x: x["left"])
+        r.sort(key=_by_left)
     return rows
 
 
+# Older name, still imported by the test scripts
+group_tokens_into_rows = group_rows
+
+
 # ----------------------- 
 # Find header row
 # ----------------------- 
 HEADER_KEYWORDS = ["description", "hsn", "hsn/sac", "quantity", "qty", "rate", "unit price", "amount", "taxable"]
 
+# All keywords in one scan. Longest-first inside a lookahead reports the
+# longest keyword starting at each position; the keywords that are its
+# prefixes (e.g. "hsn" for "hsn/sac") start there too and count as hits.
+_HEADER_KEYWORD_RE = re.compile(
+    "(?=(" + "|".join(re.escape(k) for k in sorted(HEADER_KEYWORDS, key=len, reverse=True)) + "))"
+)
+_HEADER_KEYWORD_PREFIXES = {k: frozenset(p for p in HEADER_KEYWORDS if k.startswith(p)) for k in HEADER_KEYWORDS}
+_HEADER_FALLBACK_RE = re.compile(r"hsn|quantity|rate")
+
 
 def find_header(rows):
     """Find header row by keyword matching."""
-    for i, row in enumerate(rows[:18]):
-        text = " ".join(t["text"].lower() for t in row)
-        score = sum(1 for k in HEADER_KEYWORDS if k in text)
-        if score >= 2:
-            return i
+    # Lower-cased row texts, shared by both passes
+    row_texts = [" ".join(t.text_low for t in row) for row in rows[:30]]
+    for i, text in enumerate(row_texts[:18]):
+        # Stop scanning as soon as two distinct keywords are seen
+        found = set()
+        for m in _HEADER_KEYWORD_RE.finditer(text):
+            found |= _HEADER_KEYWORD_PREFIXES[m.group(1)]
+            if len(found) >= 2:
+                return i
     # Fallback: any row containing 'hsn' or 'quantity'
-    for i, row in enumerate(rows[:30]):
-        txt = " ".join(t["text"].lower() for t in row)
-        if "hsn" in txt or "quantity" in txt or "rate" in txt:
+    for i, txt in enumerate(row_texts):
+        if _HEADER_FALLBACK_RE.search(txt):
             return i
     return None
 
 
+# Older name, still imported by the test scripts
+find_header_row = find_header
+
+
 # ----------------------- 
 # Compute column boundaries from header
 # ----------------------- 
 def compute_bounds(header_row):
-    """Compute column boundaries from header token x-positions."""
-    xs = [t["left"] for t in header_row]
-    xs_sorted = sorted(xs)
-    mids = []
-    for a, b in zip(xs_sorted, xs_sorted[1:]):
-        mids.append((a + b) / 2.0)
-    bounds = []
-    left = -1e6
-    for m in mids:
-        bounds.append((left, m))
-        left = m
-    bounds.append((left, 1e6))
-    return bounds
+    """Compute column boundaries (sorted midpoints between header token left edges).
+    
+    header_row must be ordered by left, as every row from group_rows is.
+    """
+    xs = np.fromiter((t.left for t in header_row), dtype=np.float64, count=len(header_row))
+    return (xs[:-1] + xs[1:]) / 2.0
 
 
 def assign_cols(row, bounds):
-    """Assign tokens to columns based on x-position."""
-    cols = [[] for _ in bounds]
-    for t in row:
-        cx = t["cx"]
-        placed = False
-        for i, (l, r) in enumerate(bounds):
-            if l <= cx <= r:
-                cols[i].append(t)
-                placed = True
-                break
-        if not placed:
-            # Fallback: nearest bound
-            dists = [abs(cx - (l + r) / 2.0) for (l, r) in bounds]
-            cols[dists.index(min(dists))].append(t)
+    """Assign tokens to columns based on x-position.
+    
+    Column i spans (bounds[i-1], bounds[i]], with the outer columns open-ended,
+    so one searchsorted places every token.
+    """
+    cols = [[] for _ in range(len(bounds) + 1)]
+    col_idx = np.searchsorted(bounds, [t.cx for t in row])
+    for t, c in zip(row, col_idx.tolist()):
+        cols[c].append(t)
     return cols
 
 
 def col_text(col):
     """Get text from column tokens."""
-    return " ".join(t["text"] for t in col).strip()
+    return " ".join(t.text for t in col).strip()
 
 
 def extract_amount_from_col(col):
     """Extract numeric amount from column."""
-    txt = col_text(col)
-    m = re.findall(r"[0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]{2})", txt)
-    if not m:
-        m = re.findall(r"\d+\.\d+", txt)
-    if not m:
+    return _amount_from_text(col_text(col))
+
+
+def _amount_from_text(txt):
+    """Last amount in a column's text, as a float."""
+    # Last match wins; iterate rather than materializing every match
+    last = None
+    for last in _COL_AMOUNT_RE.finditer(txt):
+        pass
+    if last is None:
+        for last in _COL_DECIMAL_RE.finditer(txt):
+            pass
+    if last is None:
         return None
-    return normalize_amount(m[-1])
+    return normalize_amount(last.group(0))
 
 
 # ----------------------- 
@@ -182,13 +372,13 @@ def parse_item_from_text_line(ln: str) -> Optional[Dict]:
     s = ln.replace("₹", " ").replace(",", "")
     
     # Look for qty patterns e.g. '13 PCS', '149 Bag', '2 PCS'
-    qty_m = re.search(r"(\d{1,6})\s*(PCS|Bag|KG|Nos|Pcs|BAG|PCS|KG|NOS)?\b", s, re.IGNORECASE)
+    qty_m = _LINE_QTY_RE.search(s)
     
     # Look for taxable/amount numbers: prefer numbers with 2 decimals
-    amounts = re.findall(r"([0-9]+\.[0-9]{2})", s)
+    amounts = _LINE_AMOUNT_RE.findall(s)
     
     # Look for HSN 4-8 digits
-    hsn_m = re.search(r"\b(\d{4,8})\b", s)
+    hsn_m = _HSN_RE.search(s)
     
     # If we have at least one decimal number and a qty: good candidate
     if amounts and qty_m:
@@ -198,18 +388,22 @@ def parse_item_from_text_line(ln: str) -> Optional[Dict]:
         
         desc = s
         # Remove numeric tokens for cleaner description
-        desc = re.sub(r"\b" + re.escape(taxable_candidate) + r"\b", "", desc)
+        desc = _remove_standalone(desc, taxable_candidate)
         if unit_price_candidate:
-            desc = re.sub(r"\b" + re.escape(unit_price_candidate) + r"\b", "", desc)
-        # Remove qty token
-        desc = re.sub(qty_m.group(0), "", desc, flags=re.IGNORECASE).strip()
+            desc = _remove_standalone(desc, unit_price_candidate)
+        # Remove qty token (case-insensitively only when it carries a unit)
+        if qty_m.group(2):
+            desc = re.sub(re.escape(qty_m.group(0)), "", desc, flags=re.IGNORECASE)
+        else:
+            desc = desc.replace(qty_m.group(0), "")
+        desc = desc.strip()
         
         # Remove HSN if present
         if hsn_m:
-            desc = re.sub(r"\b" + hsn_m.group(1) + r"\b", "", desc)
+            desc = _remove_standalone(desc, hsn_m.group(1))
         
         itm = {
-            "description": re.sub(r"\s{2,}", " ", desc).strip() or None,
+            "description": _MULTI_SPACE_RE.sub(" ", desc).strip() or None,
             "hsn": hsn_m.group(1) if hsn_m else None,
             "quantity": f"{qty_m.group(1)} {qty_m.group(2).upper()}" if qty_m.group(2) else qty_m.group(1),
             "unitPrice": normalize_amount(unit_price_candidate) if unit_price_candidate else None,
@@ -217,7 +411,7 @@ def parse_item_from_text_line(ln: str) -> Optional[Dict]:
         }
         
         # GST percent if present
-        gst_m = re.search(r"@?\s*([0-9]{1,2}(?:\.[0-9])?)\s*%", s)
+        gst_m = _LINE_GST_RE.search(s)
         if gst_m:
             itm["gstRate"] = float(gst_m.group(1))
             itm["cgstRatePct"] = float(gst_m.group(1)) / 2
@@ -227,14 +421,14 @@ def parse_item_from_text_line(ln: str) -> Optional[Dict]:
     return None
 
 
-def parse_items_fallback_by_lines(rows: List[List[Dict]]) -> List[Dict]:
+def parse_items_fallback_by_lines(rows: List[List[Token]]) -> List[Dict]:
     """
     Fallback when no header found. Iterates rows and forms logical 'line groups'
     by merging nearby lines that look like a single item (letters + numbers).
     """
     items = []
     # Convert rows to plain text lines
-    txt_lines = [" ".join(t["text"] for t in r).strip() for r in rows if any(t.get("text") for t in r)]
+    txt_lines = [" ".join(t.text for t in r).strip() for r in rows if any(t.text for t in r)]
     # Remove very short noise lines
     txt_lines = [ln for ln in txt_lines if len(ln) > 1]
     
@@ -242,7 +436,7 @@ def parse_items_fallback_by_lines(rows: List[List[Dict]]) -> List[Dict]:
     while i < len(txt_lines):
         ln = txt_lines[i]
         # If line contains big numeric sums or 'Sub Total' etc, stop
-        if re.search(r"\b(Sub\s*Total|Total|Round Off|Amount Chargeable|Tax Amount)\b", ln, re.IGNORECASE):
+        if _STOP_MARKER_RE.search(ln):
             break
         
         # Heuristic: item block likely either:
@@ -291,29 +485,36 @@ def parse_items_fallback_by_lines(rows: List[List[Dict]]) -> List[Dict]:
 # ----------------------- 
 # Build items table from rows using header bounds
 # ----------------------- 
-def parse_table_rows(rows: List[List[Dict]], header_idx: int) -> List[Dict]:
+def parse_table_rows(rows: List[List[Token]], header_idx: int) -> List[Dict]:
     """Parse table rows into structured items using column boundaries."""
     items = []
     header_row = rows[header_idx]
-    bounds = compute_column_bounds_from_header(header_row)
+    bounds = compute_bounds(header_row)
     
     # Iterate rows below header until a totals marker is found
     for row in rows[header_idx + 1:]:
-        txt_line = " ".join([t["text"].lower() for t in row])
-        if re.search(r"\b(total|sub total|amount chargeable|round off|tax amount)\b", txt_line, re.IGNORECASE):
+        txt_line = " ".join(t.text_low for t in row)
+        if _STOP_MARKER_RE.search(txt_line):
             break
         # If row is too short or blank skip
         if len(row) < 1:
             continue
+        # A kept item needs an amount, unit price or HSN code, all of which
+        # are digits; a digit-free row (wrapped description, notes) is
+        # dropped before any per-column pass
+        if not _DIGIT_RE.search(txt_line):
+            continue
         
-        cols = assign_tokens_to_columns(row, bounds)
+        cols = assign_cols(row, bounds)
         num_cols = len(cols)
+        # Column texts, built once and shared by every pass below
+        col_texts = [" ".join(t.text for t in c) for c in cols]
+        col_texts_low = [ctxt.lower() for ctxt in col_texts]
         
         # Find column with HSN-like numbers
         hsn = None
-        for c in cols:
-            ctxt = " ".join(t["text"] for t in c)
-            m = re.search(r"\b(\d{4,8})\b", ctxt)
+        for ctxt in col_texts:
+            m = _HSN_RE.search(ctxt)
             if m:
                 hsn = m.group(1)
                 break
@@ -321,9 +522,8 @@ def parse_table_rows(rows: List[List[Dict]], header_idx: int) -> List[Dict]:
         # Find qty column (contains 'pcs' or numbers)
         qty = None
         qty_col_idx = None
-        for idx, c in enumerate(cols):
-            ctxt = " ".join(t["text"].lower() for t in c)
-            if re.search(r"\bpcs\b|\bkg\b|\bbag\b|\bnos\b", ctxt) or re.search(r"\b\d+\b", ctxt):
+        for idx, ctxt in enumerate(col_texts_low):
+            if _QTY_UNIT_RE.search(ctxt) or _INTEGER_RE.search(ctxt):
                 qty_col_idx = idx
                 qty = ctxt
                 break
@@ -332,7 +532,7 @@ def parse_table_rows(rows: List[List[Dict]], header_idx: int) -> List[Dict]:
         amount = None
         amount_idx = None
         for idx in reversed(range(num_cols)):
-            a = extract_amounts_from_col(cols[idx])
+            a = _amount_from_text(col_texts[idx])
             if a is not None:
                 amount = a
                 amount_idx = idx
@@ -342,24 +542,20 @@ def parse_table_rows(rows: List[List[Dict]], header_idx: int) -> List[Dict]:
         unit_price = None
         if amount is not None and amount_idx is not None:
             if amount_idx - 1 >= 0:
-                unit_price = extract_amounts_from_col(cols[amount_idx - 1])
+                unit_price = _amount_from_text(col_texts[amount_idx - 1])
         
         # Description: combine left-most columns before qty or hsn
-        desc_parts = []
         stop_idx = min([i for i in [qty_col_idx] if i is not None] + [num_cols])
-        for i in range(0, stop_idx):
-            desc_parts.append(" ".join(t["text"] for t in cols[i]))
-        description = " ".join(p for p in desc_parts if p).strip()
+        description = " ".join(p for p in col_texts[:stop_idx] if p).strip()
         
         # If description empty, fallback to whole row text
         if not description:
-            description = " ".join(t["text"] for t in row)
+            description = " ".join(t.text for t in row)
         
         # Extract GST rate from row
         gst_rate = None
-        for c in cols:
-            ctxt = " ".join(t["text"] for t in c)
-            gstm = re.search(r"\(?([0-9]{1,2}(?:\.[0-9])?)\s*%\)?", ctxt)
+        for ctxt in col_texts:
+            gstm = _COL_GST_RE.search(ctxt)
             if gstm:
                 gst_rate = float(gstm.group(1))
                 break
@@ -390,19 +586,22 @@ def parse_table_rows(rows: List[List[Dict]], header_idx: int) -> List[Dict]:
 # ----------------------- 
 # Extract top/bottom blocks (seller/buyer/totals)
 # ----------------------- 
-def extract_top_bottom_blocks(rows: List[List[Dict]]) -> Tuple[str, str, str]:
+def extract_top_bottom_blocks(rows: List[List[Token]]) -> Tuple[str, str, str]:
     """
     Return (top_text, middle_text, bottom_text)
     top_text: first ~8 rows joined (seller area)
     bottom_text: last ~12 rows joined (totals area)
     middle_text: everything in between (likely items / buyer)
+    
+    Blocks stay joined strings rather than per-row lists: the totals, header
+    and buyer patterns match across rows ("Amount In Words" on one row, the
+    words on the next; a DOTALL buyer block), so they need the joined text.
     """
-    top_n = min(8, len(rows))
-    bottom_n = min(12, len(rows))
-    top_text = "\n".join([" ".join(t["text"] for t in r) for r in rows[:top_n]])
-    bottom_text = "\n".join([" ".join(t["text"] for t in r) for r in rows[-bottom_n:]]) if len(rows) >= bottom_n else ""
-    middle_text = "\n".join([" ".join(t["text"] for t in r) for r in rows[top_n:len(rows) - bottom_n]])
-    return top_text, middle_text, bottom_text
+    # Each row is joined once; on short pages top and bottom share rows
+    lines = [" ".join(t.text for t in r) for r in rows]
+    top_n = min(8, len(lines))
+    bottom_start = len(lines) - min(12, len(lines))
+    return "\n".join(lines[:top_n]), "\n".join(lines[top_n:bottom_start]), "\n".join(lines[bottom_start:])
 
 
 # ----------------------- 
@@ -411,43 +610,25 @@ def extract_top_bottom_blocks(rows: List[List[Dict]]) -> Tuple[str, str, str]:
 def extract_totals_from_text(bottom_text: str) -> Dict[str, Any]:
     """Extract totals using regex patterns."""
     t = {}
+    fields = scan_fields(_TOTALS_FIELDS_RE, bottom_text)
     
-    # Sub Total
-    m = re.search(r"Sub\s*Total\s*[:\s]*₹?\s*([0-9\.,-]+)", bottom_text, re.IGNORECASE)
-    t['subTotal'] = normalize_amount(m.group(1)) if m else None
+    t['subTotal'] = normalize_amount(fields.get('subTotal'))
+    t['cgst'] = normalize_amount(fields.get('cgst'))
+    t['sgst'] = normalize_amount(fields.get('sgst'))
+    t['roundOff'] = normalize_amount(fields['roundOff']) if 'roundOff' in fields else 0.0
     
-    # CGST
-    m = re.search(r"CGST@?[\d\.]*%?\s*[:\s]*₹?\s*([0-9\.,-]+)", bottom_text, re.IGNORECASE)
-    t['cgst'] = normalize_amount(m.group(1)) if m else None
-    
-    # SGST
-    m = re.search(r"SGST@?[\d\.]*%?\s*[:\s]*₹?\s*([0-9\.,-]+)", bottom_text, re.IGNORECASE)
-    t['sgst'] = normalize_amount(m.group(1)) if m else None
-    
-    # Round Off
-    m = re.search(r"Round\s*Off\s*[:\s]*([0-9\.\-]+)", bottom_text, re.IGNORECASE)
-    t['roundOff'] = normalize_amount(m.group(1)) if m else 0.0
-    
-    # Total Amount
-    m = re.search(r"Total\s*[:\s]*₹?\s*([0-9\.,-]+)", bottom_text, re.IGNORECASE)
+    # Total amount and qty share the "Total" anchor
+    m = _TOTAL_AMOUNT_RE.search(bottom_text)
     t['totalAmount'] = normalize_amount(m.group(1)) if m else None
-    
-    # Total Qty
-    m = re.search(r"Total\s+([0-9]+\s*(?:PCS|Bag|KG|Nos)?)", bottom_text, re.IGNORECASE)
+    m = _TOTAL_QTY_RE.search(bottom_text)
     t['totalQty'] = m.group(1) if m else None
     
-    # Amount in words
-    m = re.search(r"(Amount Chargeable \(in words\)|Invoice Amount In Words)(?:[:\s\n-]*)\s*(.+?)(?:\n|$)", bottom_text, re.IGNORECASE | re.DOTALL)
-    t['totalInWords'] = m.group(2).strip() if m else None
-    
-    # Tax in words
-    m = re.search(r"Tax Amount \(in words\)\s*[:\s]*([A-Za-z0-9 ,.]+)", bottom_text, re.IGNORECASE)
-    t['taxInWords'] = m.group(1).strip() if m else None
+    t['totalInWords'] = fields.get('totalInWords')
+    t['taxInWords'] = fields.get('taxInWords')
     
     # Taxable value
     if not t.get('subTotal'):
-        m = re.search(r"Taxable\s*Value\s*[:\s]*₹?\s*([0-9\.,-]+)", bottom_text, re.IGNORECASE)
-        t['taxableValue'] = normalize_amount(m.group(1)) if m else None
+        t['taxableValue'] = normalize_amount(fields.get('taxableValue'))
     else:
         t['taxableValue'] = t['subTotal']
     
@@ -468,54 +649,55 @@ def parse_ocr_fulltext(ocr_json: Dict[str, Any]) -> Dict[str, Any]:
     """
     fullTextArr = ocr_json.get("fullText", [])
     tokens = tokens_from_fulltext(fullTextArr)
-    rows = group_tokens_into_rows(tokens, y_tol=14.0)
+    rows = group_rows(tokens, y_tol=14.0)
     
     # Debug: log first few rows
-    print(f"Total rows: {len(rows)}")
-    for i, row in enumerate(rows[:10]):
-        print(f"  Row {i}: {' '.join(t['text'] for t in row)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Total rows: %d", len(rows))
+        for i, row in enumerate(rows[:10]):
+            logger.debug("  Row %d: %s", i, " ".join(t.text for t in row))
     
-    header_idx = find_header_row(rows)
+    header_idx = find_header(rows)
     items = []
     
     if header_idx is not None:
-        print(f"Header found at row {header_idx}")
+        logger.debug("Header found at row %d", header_idx)
         items = parse_table_rows(rows, header_idx)
     else:
-        print("Header not found, trying keyword search...")
+        logger.debug("Header not found, trying keyword search...")
     
     # Fallback 1: try to find 'Item name' keyword and attempt parsing below it
     if not items:
         for i, row in enumerate(rows):
-            txt = " ".join(t["text"].lower() for t in row)
+            txt = " ".join(t.text_low for t in row)
             if "item name" in txt or "description of goods" in txt:
-                print(f"Found item keyword at row {i}")
+                logger.debug("Found item keyword at row %d", i)
                 items = parse_table_rows(rows, i)
                 if items:
                     break
     
     # Fallback 2: use line-by-line heuristic parser
     if not items:
-        print("Using fallback line-by-line parser...")
+        logger.debug("Using fallback line-by-line parser...")
         items = parse_items_fallback_by_lines(rows)
-        print(f"Fallback parser found {len(items)} items")
+        logger.debug("Fallback parser found %d items", len(items))
     
     top_text, middle_text, bottom_text = extract_top_bottom_blocks(rows)
+    blocks = (top_text, middle_text, bottom_text)
     totals = extract_totals_from_text(bottom_text + "\n" + middle_text)
     
     # Seller & buyer extraction from top area
+    top_fields = scan_fields(_TOP_FIELDS_RE, top_text)
     seller = {"raw": top_text}
-    # Try to get seller name (M/s or For)
-    m = re.search(r"(M\/s\s*[A-Za-z0-9 &\.\-]+|For\s*[:\-]?\s*[A-Za-z0-9 &\.\-]+)", top_text, re.IGNORECASE)
-    if m:
-        seller['name'] = m.group(0).strip()
-    gst = re.search(r"(GSTIN[^0-9A-Z]*([A-Z0-9]{15}))", top_text, re.IGNORECASE)
-    if gst:
-        seller['gstin'] = gst.group(2)
+    # Seller name (M/s or For)
+    if 'sellerName' in top_fields:
+        seller['name'] = top_fields['sellerName']
+    if 'sellerGstin' in top_fields:
+        seller['gstin'] = top_fields['sellerGstin']
     
     # Buyer: try find 'Bill To' block in middle_text
     buyer = {}
-    m2 = re.search(r"(?:Bill\s*To|Buyer\s*\(Bill to\)|Buyer)[\s:\-]*\n?(.+?)(?:Invoice|HSN\/SAC|Description of Goods|Tax Invoice)", middle_text + "\n" + bottom_text, re.IGNORECASE | re.DOTALL)
+    m2 = _BUYER_BLOCK_RE.search(middle_text + "\n" + bottom_text)
     if m2:
         block = m2.group(1).strip()
         buyer['raw'] = " ".join(block.split())
@@ -523,22 +705,22 @@ def parse_ocr_fulltext(ocr_json: Dict[str, Any]) -> Dict[str, Any]:
         first_line = block.split('\n')[0].strip() if '\n' in block else block
         buyer['name'] = first_line
         # Find gstin & phone
-        g = re.search(r"([A-Z0-9]{15})", block)
+        g = _GSTIN_CODE_RE.search(block)
         if g:
             buyer['gstin'] = g.group(1)
-        ph = re.search(r"(\+?\d[\d\-\s]{6,}\d)", block)
+        ph = _PHONE_RE.search(block)
         if ph:
             buyer['contact'] = ph.group(1)
     else:
         # Fallback: find any GSTIN in fullText and attribute to buyer if not seller
-        all_text = top_text + "\n" + middle_text + "\n" + bottom_text
-        gst_all = re.findall(r"([A-Z0-9]{15})", all_text)
-        if gst_all:
-            seller_gstin = seller.get('gstin')
-            for gcode in gst_all:
-                if gcode != seller_gstin:
-                    buyer['gstin'] = gcode
-                    break
+        # Codes never span a newline, so the blocks are scanned in order
+        # without building their concatenation
+        seller_gstin = seller.get('gstin')
+        for block in blocks:
+            gcode = next((g for g in _GSTIN_CODE_RE.findall(block) if g != seller_gstin), None)
+            if gcode:
+                buyer['gstin'] = gcode
+                break
     
     # Assemble final
     result = {
@@ -556,23 +738,17 @@ def parse_ocr_fulltext(ocr_json: Dict[str, Any]) -> Dict[str, Any]:
         "items": items,
         "totals": totals,
         "meta": {
-            "documentType": "Tax Invoice" if "Tax Invoice" in top_text + middle_text + bottom_text else "Invoice",
-            "isComputerGenerated": "Computer Generated" in top_text + middle_text + bottom_text,
+            "documentType": "Tax Invoice" if any("Tax Invoice" in b for b in blocks) else "Invoice",
+            "isComputerGenerated": any("Computer Generated" in b for b in blocks),
             "authorisedSignatory": None
         }
     }
     
     # Try to fill invoice header fields by searching top_text
-    inv_no = re.search(r"Invoice\s*No\.?\s*[:\.\-]?\s*([A-Za-z0-9\/\-]+)", top_text, re.IGNORECASE)
-    if inv_no:
-        result['invoice']['invoiceNumber'] = inv_no.group(1)
-    inv_dt = re.search(r"\b(?:Dated|Date)\b\s*[:\.\-]?\s*([0-9]{1,2}[-\/][A-Za-z0-9]{1,3}[-\/][0-9]{2,4})", top_text, re.IGNORECASE)
-    if inv_dt:
-        result['invoice']['invoiceDate'] = inv_dt.group(1)
-    pos = re.search(r"Place\s+of\s+Supply\s*[:\.\-]?\s*([^\n\r]+)", top_text, re.IGNORECASE)
-    if pos:
-        result['invoice']['placeOfSupply'] = pos.group(1).strip()
-    ref = re.search(r"Reference\s*No\.?\s*[:\.\-]?\s*([A-Za-z0-9\/\-]+)", top_text + middle_text, re.IGNORECASE)
+    for key in ('invoiceNumber', 'invoiceDate', 'placeOfSupply'):
+        if key in top_fields:
+            result['invoice'][key] = top_fields[key]
+    ref = _REFERENCE_NO_RE.search(top_text + middle_text)
     if ref:
         result['invoice']['referenceNo'] = ref.group(1)
     
@@ -6,13 +6,22 @@ import re
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 import config
+from src.schemas import OCRLine, OCRField, QtyField, ComputedTotals
+from src.services.reconcile import compute_line_totals
 
 
+_NUM_RE = re.compile(r'[\d.]+')
+_DIGITS_RE = re.compile(r'^\d+$')
+
+# Header-row keywords (substring hits), for PP-Structure rows and heuristic rows
+_STRUCTURE_HEADER_RE = re.compile(r'description|qty|quantity|amount|total|subtotal|s\.no|sr\.no', re.I)
+_HEADER_ROW_RE = re.compile(r'description|qty|amount|total|subtotal', re.I)
+
+# Quantity units, checked in order as substrings of the qty text
+_QTY_UNITS = ("kg", "g", "bag", "piece", "pc", "pcs", "litre", "l", "ml", "meter", "m", "cm", "box", "carton")
+
 def _parse_structure_table(structure_tables, image_bgr):
     """Parse PP-Structure table results into line items."""
-    from src.schemas import OCRLine, OCRField, QtyField, ComputedTotals
-    from src.services.reconcile import compute_line_totals
-    
     if not structure_tables:
         return {"rows": [], "columns": ["description", "qty", "unitPrice", "gstRate", "hsn"], "debug": {}}
     
@@ -46,8 +55,8 @@ def _parse_structure_table(structure_tables, image_bgr):
         row_cells.sort(key=lambda c: c['bbox'][0])
         
         # Skip header rows
-        row_text = " ".join([c.get('text', '') for c in row_cells]).lower()
-        if any(keyword in row_text for keyword in ["description", "qty", "quantity", "amount", "total", "subtotal", "s.no", "sr.no"]):
+        row_text = " ".join([c.get('text', '') for c in row_cells])
+        if _STRUCTURE_HEADER_RE.search(row_text):
             continue
         
         # Extract fields from cells
@@ -70,21 +79,21 @@ def _parse_structure_table(structure_tables, image_bgr):
             # Column 2: HSN or Qty
             elif col_idx == 2:
                 # Check if numeric (qty) or alphanumeric (hsn)
-                if re.search(r'^\d+$', text):
+                if _DIGITS_RE.search(text):
                     hsn_text = text
                 else:
-                    nums = re.findall(r'[\d.]+', text.replace(",", ""))
+                    nums = _NUM_RE.findall(text.replace(",", ""))
                     if nums:
                         qty_val = float(nums[0])
                     # Extract unit
-                    units = ["kg", "g", "bag", "piece", "pc", "pcs", "litre", "l", "ml", "meter", "m", "cm", "box", "carton"]
-                    for u in units:
-                        if u.lower() in text.lower():
-                            qty_unit = u.lower()
+                    text_low = text.lower()
+                    for u in _QTY_UNITS:
+                        if u in text_low:
+                            qty_unit = u
                             break
             # Column 3: Qty or Price
             elif col_idx == 3:
-                nums = re.findall(r'[\d.]+', text.replace(",", ""))
+                nums = _NUM_RE.findall(text.replace(",", ""))
                 if nums:
                     val = float(nums[0])
                     # If qty not set, this is qty
@@ -94,7 +103,7 @@ def _parse_structure_table(structure_tables, image_bgr):
                         price_val = val
             # Column 4: Price or GST
             elif col_idx == 4:
-                nums = re.findall(r'[\d.]+', text.replace(",", ""))
+                nums = _NUM_RE.findall(text.replace(",", ""))
                 if nums:
                     val = float(nums[0])
                     if price_val == 0.0:
@@ -103,7 +112,7 @@ def _parse_structure_table(structure_tables, image_bgr):
                         gst_val = val / 100 if val > 1 else val
             # Column 5+: GST or Amount
             elif col_idx >= 5:
-                nums = re.findall(r'[\d.]+', text.replace(",", ""))
+                nums = _NUM_RE.findall(text.replace(",", ""))
                 if nums:
                     val = float(nums[0])
                     # Likely GST rate
@@ -172,80 +181,68 @@ def _detect_table_regions(image_bgr):
 
 
 def _snap_to_columns(tokens, n_columns=5):
-    """Snap tokens to column centers using clustering."""
-    if not tokens:
-        return {}
-    
-    # Get x-centers of all tokens
-    x_centers = []
-    for t in tokens:
-        bbox = t.get("bbox", [])
-        if bbox:
-            xs = [p[0] for p in bbox]
-            x_center = sum(xs) / len(xs)
-            x_centers.append((x_center, t))
+    """Snap tokens to column centers using 1D gap clustering.
     
-    if not x_centers:
-        return {}
+    The sorted x-centers are cut at their n_columns - 1 widest gaps (equal
+    gaps are cut left to right); each group's mean is a column center.
+    Tokens with a bbox carry "_cx" (set by extract_table).
+    """
+    tokens = [t for t in tokens if t.get("bbox")]
+    if not tokens:
+        return {}, []
     
     # Cluster x-centers
-    from sklearn.cluster import KMeans
-    X = np.array([[x] for x, _ in x_centers])
-    kmeans = KMeans(n_clusters=min(n_columns, len(x_centers)), random_state=0).fit(X)
+    xs = np.fromiter((t["_cx"] for t in tokens), dtype=np.float64, count=len(tokens))
+    xs_sorted = np.sort(xs)
+    n_cuts = min(n_columns, len(xs)) - 1
+    if n_cuts > 0:
+        gaps = np.diff(xs_sorted)
+        # Stable sort so equal gaps are picked in a fixed (left-first) order
+        cuts = np.sort(np.argsort(-gaps, kind="stable")[:n_cuts]) + 1
+        groups = np.split(xs_sorted, cuts)
+    else:
+        groups = [xs_sorted]
+    column_centers = [float(g.mean()) for g in groups]
     
-    # Map tokens to columns
-    column_centers = sorted(kmeans.cluster_centers_.flatten())
+    # Map tokens to the nearest column (ties go to the left column)
+    mids = (np.asarray(column_centers[:-1]) + np.asarray(column_centers[1:])) / 2
     column_tokens = {i: [] for i in range(len(column_centers))}
-    
-    for (x_center, token), label in zip(x_centers, kmeans.labels_):
-        # Find nearest column
-        nearest = min(range(len(column_centers)), key=lambda i: abs(x_center - column_centers[i]))
-        column_tokens[nearest].append(token)
+    for token, col in zip(tokens, np.searchsorted(mids, xs).tolist()):
+        column_tokens[col].append(token)
     
     return column_tokens, column_centers
 
 
 def _group_into_rows(tokens, row_threshold=30):
-    """Group tokens into rows based on y-coordinates."""
+    """Group tokens into rows based on y-coordinates (each token's "_cy")."""
+    tokens = [t for t in tokens if t.get("bbox")]
     if not tokens:
         return []
     
-    # Get y-centers
-    y_centers = []
-    for t in tokens:
-        bbox = t.get("bbox", [])
-        if bbox:
-            ys = [p[1] for p in bbox]
-            y_center = sum(ys) / len(ys)
-            y_centers.append((y_center, t))
-    
-    y_centers.sort(key=lambda x: x[0])
-    
-    # Group into rows
-    rows = []
-    current_row = []
-    current_y = None
-    
-    for y_center, token in y_centers:
-        if current_y is None or abs(y_center - current_y) < row_threshold:
-            current_row.append(token)
-            current_y = y_center if current_y is None else (current_y + y_center) / 2
+    ys = np.fromiter((t["_cy"] for t in tokens), dtype=np.float64, count=len(tokens))
+    order = np.argsort(ys, kind="stable")
+    ys_sorted = ys[order].tolist()
+    
+    # Rows break where a y-center strays from the row's running average
+    # (halved towards each new member), so only the break indices are
+    # found in Python
+    starts = [0]
+    current_y = ys_sorted[0]
+    for i in range(1, len(ys_sorted)):
+        y_center = ys_sorted[i]
+        if abs(y_center - current_y) < row_threshold:
+            current_y = (current_y + y_center) / 2
         else:
-            if current_row:
-                rows.append(current_row)
-            current_row = [token]
+            starts.append(i)
             current_y = y_center
+    starts.append(len(ys_sorted))
     
-    if current_row:
-        rows.append(current_row)
-    
-    return rows
+    order = order.tolist()
+    return [[tokens[i] for i in order[a:b]] for a, b in zip(starts, starts[1:])]
 
 
 def _parse_line_item(tokens, column_centers):
     """Parse a row of tokens into line item fields."""
-    from src.schemas import OCRField, QtyField
-    
     # If no column centers, use simple left-to-right ordering
     if not column_centers:
         # Just assign tokens in order
@@ -259,10 +256,8 @@ def _parse_line_item(tokens, column_centers):
         # Map tokens to columns
         token_cols = {}
         for t in tokens:
-            bbox = t.get("bbox", [])
-            if bbox:
-                xs = [p[0] for p in bbox]
-                x_center = sum(xs) / len(xs)
+            if t.get("bbox"):
+                x_center = t["_cx"]
                 if column_centers:
                     nearest_col = min(range(len(column_centers)), key=lambda i: abs(x_center - column_centers[i]))
                     if nearest_col not in token_cols:
@@ -281,8 +276,7 @@ def _parse_line_item(tokens, column_centers):
             return OCRField(value=default, confidence=0.0)
         text = " ".join([t["text"] for t in tokens])
         # Clean and extract number
-        import re
-        nums = re.findall(r'[\d.]+', text.replace(",", ""))
+        nums = _NUM_RE.findall(text.replace(",", ""))
         if nums:
             try:
                 val = float(nums[0])
@@ -299,15 +293,13 @@ def _parse_line_item(tokens, column_centers):
             return QtyField(value=default, confidence=0.0, unit=None)
         text = " ".join([t["text"] for t in tokens])
         # Extract number and unit
-        import re
         # Try to find number
-        nums = re.findall(r'[\d.]+', text.replace(",", ""))
-        # Common units
-        units = ["kg", "g", "bag", "piece", "pc", "pcs", "litre", "l", "ml", "meter", "m", "cm", "box", "carton"]
+        nums = _NUM_RE.findall(text.replace(",", ""))
+        text_low = text.lower()
         unit = None
-        for u in units:
-            if u.lower() in text.lower():
-                unit = u.lower()
+        for u in _QTY_UNITS:
+            if u in text_low:
+                unit = u
                 break
         
         val = default
@@ -332,9 +324,9 @@ def _parse_line_item(tokens, column_centers):
         all_bboxes = [t.get("bbox") for t in tokens if t.get("bbox")]
         bbox = None
         if all_bboxes:
-            xs = [p[0] for b in all_bboxes for p in b]
-            ys = [p[1] for b in all_bboxes for p in b]
-            bbox = [[min(xs), min(ys)], [max(xs), min(ys)], [max(xs), max(ys)], [min(xs), max(ys)]]
+            pts = np.asarray(all_bboxes, dtype=np.float64).reshape(-1, 2)
+            (xmin, ymin), (xmax, ymax) = pts.min(axis=0).tolist(), pts.max(axis=0).tolist()
+            bbox = [[xmin, ymin], [xmax, ymin], [xmax, ymax], [xmin, ymax]]
         return OCRField(value=text, confidence=conf, bbox=bbox)
     
     description = _extract_text(description_tokens)
@@ -361,7 +353,7 @@ def extract_table(tokens, image_bgr):
     # Try PP-Structure first if enabled
     if config.USE_PP_STRUCTURE:
         from src.services.ocr_engine import extract_table_with_structure
-        structure_tables = extract_table_with_structure(image_bgr)
+        structure_tables = extract_table_with_structure(image_bgr, tokens)
         
         if structure_tables:
             # Use PP-Structure results
@@ -372,14 +364,16 @@ def extract_table(tokens, image_bgr):
     h, w = image_bgr.shape[:2]
     header_threshold = h * 0.3
     
-    table_tokens = []
-    for t in tokens:
-        bbox = t.get("bbox", [])
-        if bbox:
-            ys = [p[1] for p in bbox]
-            y_center = sum(ys) / len(ys)
-            if y_center > header_threshold:
-                table_tokens.append(t)
+    # Token centers, computed once here for the header filter and every
+    # helper below: (N, 4, 2) quad corners -> (N, 2) centers in one reduction
+    boxed = [t for t in tokens if t.get("bbox")]
+    if boxed:
+        centers = np.asarray([t["bbox"] for t in boxed], dtype=np.float64).mean(axis=1)
+        for t, (cx, cy) in zip(boxed, centers.tolist()):
+            t["_cx"] = cx
+            t["_cy"] = cy
+    
+    table_tokens = [t for t in boxed if t["_cy"] > header_threshold]
     
     if not table_tokens:
         return {"rows": [], "columns": ["description", "qty", "unitPrice", "gstRate", "hsn"], "debug": {}}
@@ -401,15 +395,12 @@ def extract_table(tokens, image_bgr):
     line_items = []
     for i, row_tokens in enumerate(rows):
         # Skip header rows
-        row_text = " ".join([t["text"] for t in row_tokens]).lower()
-        if any(keyword in row_text for keyword in ["description", "qty", "amount", "total", "subtotal"]):
+        row_text = " ".join([t["text"] for t in row_tokens])
+        if _HEADER_ROW_RE.search(row_text):
             continue
         
         item = _parse_line_item(row_tokens, column_centers)
         if item["description"].value and item["qty"].value:
-            from src.schemas import OCRLine, ComputedTotals, QtyField
-            from src.services.reconcile import compute_line_totals
-            
             qty_val = item["qty"].value or 0.0
             price_val = item["unitPrice"].value or 0.0
             gst_val = item["gstRate"].value or 0.0
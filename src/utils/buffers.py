@@ -0,0 +1,31 @@
+import threading
+import numpy as np
+import sys
+import os
+
+# Add parent directory to path for config import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import config
+
+
+_LOCAL = threading.local()
+_MAX_BYTES = config.SCRATCH_BUFFER_MAX_MB * 1024 * 1024
+
+
+def scratch_array(name, shape, dtype):
+    """Per-thread reusable array for an intermediate (never returned) result.
+    
+    Each name keeps one flat buffer per thread, grown to the largest size seen
+    up to SCRATCH_BUFFER_MAX_MB; larger requests get a fresh array that is not
+    kept. The returned array is valid until the next call with the same name
+    on the same thread.
+    """
+    dtype = np.dtype(dtype)
+    size = int(np.prod(shape))
+    if size * dtype.itemsize > _MAX_BYTES:
+        return np.empty(shape, dtype)
+    buf = getattr(_LOCAL, name, None)
+    if buf is None or buf.dtype != dtype or buf.size < size:
+        buf = np.empty(size, dtype)
+        setattr(_LOCAL, name, buf)
+    return buf[:size].reshape(shape)
@@ -0,0 +1,15 @@
+import re
+from typing import Dict
+
+
+def scan_fields(pattern: re.Pattern, text: str) -> Dict[str, str]:
+    """Single pass over text returning the first value of each named group."""
+    found = {}
+    wanted = len(pattern.groupindex)
+    for m in pattern.finditer(text):
+        key = m.lastgroup
+        if key not in found:
+            found[key] = m.group(key).strip()
+            if len(found) == wanted:
+                break
+    return found
@@ -1,9 +1,6 @@
 import hashlib
-from PIL import Image
-import imagehash
 import numpy as np
 import cv2
-import io
 
 
 def sha256_bytes(b: bytes) -> str:
@@ -12,7 +9,13 @@ def sha256_bytes(b: bytes) -> str:
 
 
 def perceptual_hash(img_bgr) -> str:
-    """Compute perceptual hash of image."""
-    img = Image.fromarray(cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB))
-    return str(imagehash.phash(img))
-
+    """Compute perceptual hash of image (imagehash.phash layout, 16 hex chars)."""
+    gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8]
+    # cv2.dct is orthonormal; rescale the DC row/column so the coefficients
+    # are proportional to imagehash's unnormalized DCT and the median split
+    # picks the same bits
+    low[0, :] *= np.sqrt(2)
+    low[:, 0] *= np.sqrt(2)
+    return np.packbits(low > np.median(low)).tobytes().hex()
@@ -6,26 +6,60 @@ import os
 # Add parent directory to path for config import
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 import config
+from .buffers import scratch_array
 
 
-def _focus_score(img):
-    """Calculate focus score using variance of Laplacian."""
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+# Longest side the skew estimate is computed at
+_DESKEW_MAX_SIDE = 1000
+# Blank-page check: every 16th pixel per axis, fewer than 50 dark ones
+_BLANK_SAMPLE_STEP = 16
+_BLANK_MIN_DARK = 50
 
 
-def _glare_ratio(img):
+def _focus_score(gray):
+    """Calculate focus score using variance of Laplacian (or Vollath F4, per FOCUS_METRIC)."""
+    if config.FOCUS_METRIC == "vollath":
+        return _vollath_f4(gray)
+    # 32-bit output is exact for a uint8 Laplacian and half the bytes of CV_64F;
+    # meanStdDev gets the variance in one pass over it
+    lap = cv2.Laplacian(gray, cv2.CV_32F, dst=scratch_array("laplacian", gray.shape, np.float32))
+    _, std = cv2.meanStdDev(lap)
+    return float(std[0, 0] ** 2)
+
+
+def _vollath_f4(gray):
+    """Vollath F4 focus measure: lag-1 minus lag-2 horizontal autocorrelation, per pixel."""
+    # Products of two uint8 values are exact in float32; sums are in double
+    lag1 = cv2.multiply(gray[:, :-1], gray[:, 1:], dtype=cv2.CV_32F)
+    lag2 = cv2.multiply(gray[:, :-2], gray[:, 2:], dtype=cv2.CV_32F)
+    return float(cv2.sumElems(lag1)[0] - cv2.sumElems(lag2)[0]) / gray.size
+
+
+def _glare_ratio(gray):
     """Calculate ratio of overexposed pixels."""
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    return float((gray > 250).sum()) / gray.size
+    _, mask = cv2.threshold(gray, 250, 255, cv2.THRESH_BINARY)
+    return cv2.countNonZero(mask) / gray.size
 
 
-def _deskew_angle(img):
+def _deskew_angle(gray):
     """Detect skew angle using minimum area rectangle."""
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    coords = np.column_stack(np.where(gray < 250))
-    if coords.size == 0:
+    # A (near-)blank page has no content to measure a skew from; a strided
+    # view finds that without touching most of the image
+    sampled = gray[::_BLANK_SAMPLE_STEP, ::_BLANK_SAMPLE_STEP]
+    if np.count_nonzero(sampled < 250) < _BLANK_MIN_DARK:
         return 0.0
+    # The rectangle's angle does not change under uniform scaling, so fit it
+    # on a downsampled copy with far fewer dark pixels
+    scale = _DESKEW_MAX_SIDE / max(gray.shape[:2])
+    if scale < 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    # Dark (< 250) pixels as a mask: BINARY_INV zeroes everything above 249
+    _, dark = cv2.threshold(gray, 249, 255, cv2.THRESH_BINARY_INV)
+    points = cv2.findNonZero(dark)
+    if points is None:
+        return 0.0
+    # findNonZero yields (x, y); the fit has always been on (row, col) points
+    coords = np.ascontiguousarray(points[:, 0, ::-1])
     angle = cv2.minAreaRect(coords)[-1]
     return -(90 + angle) if angle < -45 else -angle
 
@@ -42,10 +76,6 @@ def assess_quality(img_bgr, content_type: str | None = None):
         Dictionary with quality metrics and reject flag
     """
     h, w = img_bgr.shape[:2]
-    focus = _focus_score(img_bgr)
-    glare = _glare_ratio(img_bgr)
-    angle = _deskew_angle(img_bgr)
-    
     is_pdf = (content_type == "application/pdf")
     
     # PDFs are usually crisp after rasterization; be more lenient
@@ -54,11 +84,22 @@ def assess_quality(img_bgr, content_type: str | None = None):
     glare_threshold = 0.12 if is_pdf else config.MAX_GLARE
     
     min_edge_ok = max(h, w) >= min_edge_threshold
-    focus_ok = focus >= focus_threshold
-    glare_ok = glare <= glare_threshold
     
-    # Only reject if REJECT_IF_BAD_QUALITY is enabled and quality is poor
-    reject = config.REJECT_IF_BAD_QUALITY and not (min_edge_ok and focus_ok and glare_ok)
+    # One grayscale conversion shared by all metrics, into this thread's
+    # reused buffer (gray never leaves this function)
+    gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY, dst=scratch_array("gray", (h, w), np.uint8))
+    focus = _focus_score(gray)
+    glare = _glare_ratio(gray)
+    # An undersized image (not PDF; those are only warned about and still
+    # deskewed) is rejected whatever its skew, so the min-area rectangle fit,
+    # the costliest metric, is skipped for it
+    rejected_by_size = config.REJECT_IF_BAD_QUALITY and not min_edge_ok and not is_pdf
+    angle = 0.0 if rejected_by_size else _deskew_angle(gray)
+    
+    # All three checks combined with bitwise & (no short-circuiting); only
+    # reject if REJECT_IF_BAD_QUALITY is enabled and quality is poor
+    quality_ok = min_edge_ok & (focus >= focus_threshold) & (glare <= glare_threshold)
+    reject = config.REJECT_IF_BAD_QUALITY and not quality_ok
     
     return {
         "focus": focus,
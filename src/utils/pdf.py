@@ -1,4 +1,7 @@
 import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import numpy as np
 from PIL import Image
 import pypdfium2 as pdfium
@@ -10,6 +13,56 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 import config
 
 
+_POOL = None
+
+
+def _get_pool():
+    """Get or start the PDF render worker pool."""
+    global _POOL
+    if _POOL is None:
+        # pdfium is not thread-safe, so pages render in separate processes
+        _POOL = ProcessPoolExecutor(
+            max_workers=config.PDF_RENDER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _POOL
+
+
+def _reset_pool(pool):
+    """Drop a broken pool so the next _get_pool starts a fresh one."""
+    global _POOL
+    # Another caller may already have replaced it
+    if _POOL is pool:
+        _POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _render_pages_in_pool(raw, n_pages, scale):
+    """Render the first n_pages in the pool, restarting it once if a worker died."""
+    pool = _get_pool()
+    try:
+        futures = [pool.submit(_worker_render_page, raw, i, scale) for i in range(n_pages)]
+        return [f.result() for f in futures]
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        pool = _get_pool()
+        futures = [pool.submit(_worker_render_page, raw, i, scale) for i in range(n_pages)]
+        return [f.result() for f in futures]
+
+
+def _render_page(page, scale):
+    """Render one pdfium page to a BGR array."""
+    # An opaque render is a packed BGR bitmap in a Python-owned buffer, so the
+    # NumPy view over it is already the page in OpenCV's channel order
+    return page.render(scale=scale, rotation=0).to_numpy()
+
+
+def _worker_render_page(raw, index, scale):
+    """Pool task: render page `index` of the PDF in `raw` with the worker's own pdfium."""
+    pdf = pdfium.PdfDocument(io.BytesIO(raw))
+    return _render_page(pdf[index], scale)
+
+
 def rasterize_pdf_if_needed(raw: bytes, content_type: str):
     """Rasterize PDF to images or convert image bytes to BGR array."""
     if content_type != "application/pdf":
@@ -18,10 +71,10 @@ def rasterize_pdf_if_needed(raw: bytes, content_type: str):
     
     pdf = pdfium.PdfDocument(io.BytesIO(raw))
     scale = 300/72.0  # ~300 DPI
-    pages_bgr = []
-    for i in range(min(len(pdf), config.MAX_PAGES)):
-        page = pdf[i]
-        pil_img = page.render(scale=scale, rotation=0).to_pil()
-        pages_bgr.append(cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR))
-    return pages_bgr
-
+    n_pages = min(len(pdf), config.MAX_PAGES)
+    
+    # Multi-page documents render in parallel when a pool is configured
+    if config.PDF_RENDER_WORKERS > 0 and n_pages > 1:
+        return _render_pages_in_pool(raw, n_pages, scale)
+    
+    return [_render_page(pdf[i], scale) for i in range(n_pages)]
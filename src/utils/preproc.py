@@ -1,5 +1,15 @@
 import cv2
 import numpy as np
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import config
+from .buffers import scratch_array
+
+
+# Fixed-parameter CLAHE operator, built once rather than per page
+_CLAHE = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
 
 
 def perspective_transform(img_bgr):
@@ -20,15 +30,11 @@ def perspective_transform(img_bgr):
         # Apply perspective transform
         pts = approx.reshape(4, 2)
         rect = order_points(pts)
-        (tl, tr, br, bl) = rect
-        
-        widthA = np.sqrt(((br[0] - bl[0]) ** 2) + ((br[1] - bl[1]) ** 2))
-        widthB = np.sqrt(((tr[0] - tl[0]) ** 2) + ((tr[1] - tl[1]) ** 2))
-        maxWidth = max(int(widthA), int(widthB))
         
-        heightA = np.sqrt(((tr[0] - br[0]) ** 2) + ((tr[1] - br[1]) ** 2))
-        heightB = np.sqrt(((tl[0] - bl[0]) ** 2) + ((tl[1] - bl[1]) ** 2))
-        maxHeight = max(int(heightA), int(heightB))
+        # Side lengths tl-tr, tr-br, br-bl, bl-tl in one norm over the quad
+        sides = np.linalg.norm(rect - np.roll(rect, -1, axis=0), axis=1)
+        maxWidth = max(int(sides[0]), int(sides[2]))
+        maxHeight = max(int(sides[1]), int(sides[3]))
         
         dst = np.array([
             [0, 0],
@@ -46,29 +52,35 @@ def perspective_transform(img_bgr):
 
 def order_points(pts):
     """Order points in top-left, top-right, bottom-right, bottom-left order."""
-    rect = np.zeros((4, 2), dtype="float32")
     s = pts.sum(axis=1)
-    rect[0] = pts[np.argmin(s)]
-    rect[2] = pts[np.argmax(s)]
-    
-    diff = np.diff(pts, axis=1)
-    rect[1] = pts[np.argmin(diff)]
-    rect[3] = pts[np.argmax(diff)]
-    return rect
+    diff = pts[:, 1] - pts[:, 0]
+    # One gather of the four corners: min/max of x+y and of y-x
+    return pts[[s.argmin(), diff.argmin(), s.argmax(), diff.argmax()]].astype("float32")
 
 
-def enhance_image(img_bgr):
-    """Enhance image for better OCR: CLAHE, denoise, adaptive threshold."""
-    # Convert to LAB and apply CLAHE to L channel
-    lab = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2LAB)
-    l, a, b = cv2.split(lab)
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-    l = clahe.apply(l)
-    enhanced = cv2.merge([l, a, b])
-    enhanced = cv2.cvtColor(enhanced, cv2.COLOR_LAB2BGR)
+def enhance_image(img_bgr, quality_info=None):
+    """Enhance image for better OCR: CLAHE, denoise, adaptive threshold.
+    
+    quality_info is the page's assess_quality result; a page whose focus
+    score is above FOCUS_SKIP_DENOISE is already crisp and skips denoising.
+    """
+    # Convert to YCrCb (a linear transform, unlike LAB's cube roots) and
+    # apply CLAHE to the luma channel
+    ycrcb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2YCrCb, dst=scratch_array("ycrcb", img_bgr.shape, np.uint8))
+    y, cr, cb = cv2.split(ycrcb)
+    y = _CLAHE.apply(y)
+    enhanced = cv2.merge([y, cr, cb])
+    enhanced = cv2.cvtColor(enhanced, cv2.COLOR_YCrCb2BGR)
+    
+    if quality_info and quality_info.get("focus", 0.0) > config.FOCUS_SKIP_DENOISE:
+        return enhanced
     
-    # Denoise
-    denoised = cv2.fastNlMeansDenoisingColored(enhanced, None, 10, 10, 7, 21)
+    # Denoise: edge-preserving bilateral filter by default; non-local means
+    # is seconds per page and only used when explicitly enabled
+    if config.HIGH_QUALITY_DENOISE:
+        denoised = cv2.fastNlMeansDenoisingColored(enhanced, None, 10, 10, 7, 21)
+    else:
+        denoised = cv2.bilateralFilter(enhanced, 5, 50, 50)
     
     return denoised
 
@@ -82,7 +94,7 @@ def upscale_if_needed(img_bgr, min_long_edge=2400):
         scale = min_long_edge / long_edge
         new_w = int(w * scale)
         new_h = int(h * scale)
-        return cv2.resize(img_bgr, (new_w, new_h), interpolation=cv2.INTER_CUBIC)
+        return cv2.resize(img_bgr, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
     
     return img_bgr
 
@@ -95,6 +107,6 @@ def deskew_image(img_bgr, angle):
     h, w = img_bgr.shape[:2]
     center = (w // 2, h // 2)
     M = cv2.getRotationMatrix2D(center, angle, 1.0)
-    rotated = cv2.warpAffine(img_bgr, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
+    rotated = cv2.warpAffine(img_bgr, M, (w, h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
     return rotated
 
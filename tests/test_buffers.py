@@ -0,0 +1,20 @@
+import numpy as np
+
+from src.utils import buffers
+from src.utils.buffers import scratch_array
+
+
+def test_scratch_array_reuses_buffer():
+    a = scratch_array("test_reuse", (4, 8), np.uint8)
+    b = scratch_array("test_reuse", (2, 8), np.uint8)
+    assert b.shape == (2, 8)
+    assert np.shares_memory(a, b)
+
+
+def test_scratch_array_does_not_keep_oversized(monkeypatch):
+    monkeypatch.setattr(buffers, "_MAX_BYTES", 64)
+    small = scratch_array("test_cap", (4, 4), np.float32)
+    big = scratch_array("test_cap", (8, 8), np.float32)
+    assert big.shape == (8, 8)
+    assert not np.shares_memory(small, big)
+    assert buffers._LOCAL.test_cap.size == 16
@@ -0,0 +1,23 @@
+from src.services.invoice_transformer import extract_buyer
+
+
+def test_buyer_contact_skips_dates_and_pin_codes():
+    text = (
+        "Bill To\n"
+        "SHREE RAM IRON\n"
+        "Dated 20-08-2025\n"
+        "Patna 800001\n"
+        "Contact No: +917779886449\n"
+        "Phone: 98765 43210\n"
+        "GSTIN Number: 10FVYPK2595A1ZG\n"
+        "Invoice No: 297\n"
+    )
+    buyer = extract_buyer(text)
+    assert buyer["name"] == "SHREE RAM IRON"
+    assert buyer["gstin"] == "10FVYPK2595A1ZG"
+    assert buyer["contact"] == "+917779886449"
+
+
+def test_buyer_without_contact_line():
+    buyer = extract_buyer("Bill To\nSHREE RAM IRON\nPatna 800001\nDate: 20-08-2025\nInvoice No: 297\n")
+    assert "contact" not in buyer
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+import config
+from src.services import ocr_engine
+
+
+def _token(text, x0, y0, x1, y1, conf=0.9):
+    return {"text": text, "conf": conf, "bbox": [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]}
+
+
+def _fake_structure(cell_bboxes):
+    def structure_ocr(image_bgr):
+        return [{"type": "table", "bbox": [0, 0, 100, 60], "res": {"html": "<table></table>", "cell_bbox": cell_bboxes}}]
+    return structure_ocr
+
+
+def _setup(monkeypatch, cell_bboxes):
+    """Stub PP-Structure and the recognizer; returns the list of recognizer batches."""
+    batches = []
+    
+    def recognize(crops):
+        batches.append(crops)
+        return [(f"rec{i}", 0.5) for i in range(len(crops))]
+    
+    monkeypatch.setattr(config, "OCR_WORKERS", 0)
+    monkeypatch.setattr(config, "ENABLE_HANDWRITING_DETECTION", False)
+    monkeypatch.setattr(ocr_engine, "get_structure_ocr", lambda: _fake_structure(cell_bboxes))
+    monkeypatch.setattr(ocr_engine, "_recognize_crops", recognize)
+    return batches
+
+
+def test_structure_cells_take_page_tokens(monkeypatch):
+    batches = _setup(monkeypatch, [[0, 0, 50, 20], [50, 0, 100, 20]])
+    tokens = [
+        _token("Cement", 5, 5, 20, 15, conf=0.8),
+        _token("Bag", 25, 5, 45, 15, conf=0.6),
+        _token("450.00", 55, 5, 95, 15, conf=0.9),
+    ]
+    
+    tables = ocr_engine.extract_table_with_structure(np.zeros((60, 100, 3), np.uint8), tokens)
+    
+    cells = tables[0]["cells"]
+    assert [c["text"] for c in cells] == ["Cement Bag", "450.00"]
+    assert cells[0]["conf"] == pytest.approx(0.7)
+    assert batches == []
+
+
+def test_empty_structure_cells_are_recognized_in_one_batch(monkeypatch):
+    batches = _setup(monkeypatch, [[0, 0, 50, 20], [50, 0, 100, 20], [0, 20, 50, 40]])
+    tokens = [_token("450.00", 55, 5, 95, 15)]
+    
+    tables = ocr_engine.extract_table_with_structure(np.zeros((60, 100, 3), np.uint8), tokens)
+    
+    cells = tables[0]["cells"]
+    assert [c["text"] for c in cells] == ["rec0", "450.00", "rec1"]
+    assert [c["conf"] for c in (cells[0], cells[2])] == [0.5, 0.5]
+    assert len(batches) == 1
+    assert [crop.shape[:2] for crop in batches[0]] == [(20, 50), (20, 50)]
+
+
+def test_structure_without_tokens_recognizes_every_cell(monkeypatch):
+    batches = _setup(monkeypatch, [[0, 0, 50, 20], [50, 0, 100, 20]])
+    
+    tables = ocr_engine.extract_table_with_structure(np.zeros((60, 100, 3), np.uint8))
+    
+    assert [c["text"] for c in tables[0]["cells"]] == ["rec0", "rec1"]
+    assert len(batches) == 1
+
+
+def test_structure_unavailable(monkeypatch):
+    monkeypatch.setattr(ocr_engine, "get_structure_ocr", lambda: None)
+    assert ocr_engine.extract_table_with_structure(np.zeros((10, 10, 3), np.uint8)) is None
+
+
+def test_models_loaded_waits_for_pool_warmup(monkeypatch):
+    from concurrent.futures import Future
+    
+    warmup = Future()
+    monkeypatch.setattr(config, "OCR_WORKERS", 1)
+    monkeypatch.setattr(ocr_engine, "_POOL", object())
+    monkeypatch.setattr(ocr_engine, "_WARMUP", warmup)
+    
+    assert not ocr_engine.models_loaded()
+    warmup.set_exception(RuntimeError("PaddleOCR failed to load"))
+    assert not ocr_engine.models_loaded()
+    
+    warmup = Future()
+    warmup.set_result(True)
+    monkeypatch.setattr(ocr_engine, "_WARMUP", warmup)
+    assert ocr_engine.models_loaded()
+
+
+def _no_ocr():
+    """Stand-in pool initializer (PaddleOCR is not needed by these tasks)."""
+    return None
+
+
+def _crash_once(marker):
+    """Pool task that kills its worker the first time it runs, then returns 42."""
+    import os
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return 42
+
+
+def test_pool_restarts_after_worker_crash(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "OCR_WORKERS", 1)
+    monkeypatch.setattr(ocr_engine, "get_ocr", _no_ocr)
+    monkeypatch.setattr(ocr_engine, "_POOL", None)
+    monkeypatch.setattr(ocr_engine, "_WARMUP", None)
+    try:
+        assert ocr_engine._run_in_pool(_crash_once, str(tmp_path / "crashed")) == 42
+    finally:
+        ocr_engine._POOL.shutdown()
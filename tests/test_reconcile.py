@@ -0,0 +1,49 @@
+import random
+
+from src.schemas import OCRLine, OCRField, QtyField
+from src.services.reconcile import compute_line_totals, recompute_and_summarize, split_tax
+
+
+def _line(i, qty, rate, gst):
+    return OCRLine(
+        rowId=f"r{i}",
+        qty=QtyField(value=qty),
+        unitPrice=OCRField(value=rate),
+        gstRate=OCRField(value=gst)
+    )
+
+
+def test_recompute_matches_compute_line_totals():
+    """Batch recomputation rounds every line exactly like compute_line_totals."""
+    rng = random.Random(0)
+    cases = [(33, 2657.3, 0.05)] + [
+        (rng.randint(1, 500), round(rng.uniform(1, 5000), 2), rng.choice([0, 0.05, 0.12, 0.18, 0.28]))
+        for _ in range(2000)
+    ]
+    rows = [_line(i, q, p, g) for i, (q, p, g) in enumerate(cases)]
+    
+    totals = recompute_and_summarize(rows)
+    
+    expected = [compute_line_totals(q, p, g) for q, p, g in cases]
+    for r, (net, tax, gross) in zip(rows, expected):
+        assert (r.computed.net, r.computed.tax, r.computed.gross) == (net, tax, gross)
+    assert totals["net"] == round(sum(e[0] for e in expected), 2)
+    assert totals["tax"] == round(sum(e[1] for e in expected), 2)
+    assert totals["gross"] == round(sum(e[2] for e in expected), 2)
+
+
+def test_half_paisa_line_uses_python_rounding():
+    rows = [_line(1, 33, 2657.3, 0.05)]
+    recompute_and_summarize(rows)
+    assert rows[0].computed.tax == 4384.55
+    assert rows[0].computed.gross == 92075.45
+
+
+def test_recompute_empty_rows():
+    totals = recompute_and_summarize([])
+    assert (totals["net"], totals["tax"], totals["gross"]) == (0.0, 0.0, 0.0)
+
+
+def test_split_tax():
+    assert split_tax(100.5, None) == (50.25, 50.25, 0.0)
+    assert split_tax(100.0, "Bihar") == (0.0, 0.0, 100.0)
@@ -0,0 +1,122 @@
+import numpy as np
+
+from src.services.spatial_parser import (
+    _row_starts,
+    compute_bounds,
+    find_header,
+    find_header_row,
+    group_rows,
+    group_tokens_into_rows,
+    parse_ocr_fulltext,
+    parse_table_rows,
+    tokens_from_fulltext
+)
+
+
+def _block(text, x0, x1, y, confidence=0.95):
+    return {"text": text, "bbox": [[x0, y], [x1, y], [x1, y + 20], [x0, y + 20]], "confidence": confidence}
+
+
+TABLE_OCR = {
+    "fullText": [
+        _block("Description", 100, 250, 320),
+        _block("HSN", 260, 320, 320),
+        _block("Qty", 330, 400, 320),
+        _block("Rate", 430, 520, 320),
+        _block("Amount", 540, 620, 320),
+        _block("NATURAL GYPSUM PLASTER", 100, 250, 350),
+        _block("2520", 260, 310, 350),
+        _block("149 Bag", 330, 400, 350),
+        _block("263.00", 430, 510, 350),
+        _block("39,187.00", 540, 640, 350),
+        _block("WHITE CEMENT", 100, 250, 380),
+        _block("2523", 260, 310, 380),
+        _block("10 Bag", 330, 400, 380),
+        _block("450.00", 430, 510, 380),
+        _block("4,500.00", 540, 640, 380),
+        _block("(18%)", 650, 700, 380),
+        _block("Sub Total 43,687.00", 100, 350, 420),
+    ]
+}
+
+
+def test_compute_bounds_are_header_midpoints():
+    rows = group_rows(tokens_from_fulltext(TABLE_OCR["fullText"]))
+    assert compute_bounds(rows[0]).tolist() == [180.0, 295.0, 380.0, 485.0]
+
+
+def test_parse_table_rows_golden():
+    """Column-driven fields of each item row on a sample OCR payload."""
+    rows = group_rows(tokens_from_fulltext(TABLE_OCR["fullText"]))
+    header_idx = find_header(rows)
+    assert header_idx == 0
+    
+    items = parse_table_rows(rows, header_idx)
+    
+    fields = ("description", "hsn", "unitPrice", "taxableValue", "gstRate")
+    assert [{k: item[k] for k in fields} for item in items] == [
+        {"description": "NATURAL GYPSUM PLASTER", "hsn": "2520", "unitPrice": 263.0, "taxableValue": 39187.0, "gstRate": None},
+        {"description": "WHITE CEMENT", "hsn": "2523", "unitPrice": 450.0, "taxableValue": 4500.0, "gstRate": 18.0},
+    ]
+
+
+INVOICE_OCR = {
+    "fullText": [
+        _block("Invoice No.: 297", 100, 250, 50),
+        _block("Date: 20-08-2025", 300, 450, 50),
+        _block("For: RANG MAHAL", 100, 300, 100),
+        _block("GSTIN: 10CKXPK7984A1ZV", 100, 350, 130),
+        _block("Bill To", 100, 180, 180),
+        _block("SHREE RAM IRON", 100, 280, 210),
+        _block("GSTIN Number: 10FVYPK2595A1ZG", 100, 400, 240),
+        _block("#", 100, 120, 320),
+        _block("Item name", 130, 250, 320),
+        _block("HSN", 260, 320, 320),
+        _block("Quantity", 330, 420, 320),
+        _block("Unit Price", 430, 530, 320),
+        _block("Amount", 540, 620, 320),
+        _block("1", 100, 120, 350),
+        _block("NATURAL GYPSUM CALCINED PLASTER", 130, 380, 350),
+        _block("2520", 260, 310, 350),
+        _block("149 Bag", 330, 400, 350),
+        _block("₹ 263.00", 430, 510, 350),
+        _block("₹ 39,187.00", 540, 640, 350),
+        _block("(5.0%)", 650, 700, 350),
+        _block("Sub Total ₹ 39,187.00", 100, 350, 420),
+        _block("SGST@2.5% ₹ 979.68", 100, 300, 450),
+        _block("CGST@2.5% ₹ 979.68", 100, 300, 480),
+        _block("Invoice Amount In Words", 100, 350, 580),
+        _block("Forty One Thousand One Hundred and Forty Six Rupees only", 100, 600, 610),
+    ]
+}
+
+
+def test_old_names_alias_current_functions():
+    assert group_tokens_into_rows is group_rows
+    assert find_header_row is find_header
+
+
+def test_parse_ocr_fulltext_end_to_end():
+    result = parse_ocr_fulltext(INVOICE_OCR)
+    
+    assert result["invoice"]["invoiceNumber"] == "297"
+    assert result["invoice"]["invoiceDate"] == "20-08-2025"
+    assert result["seller"]["name"] == "For: RANG MAHAL"
+    assert result["seller"]["gstin"] == "10CKXPK7984A1ZV"
+    assert result["buyer"]["gstin"] == "10FVYPK2595A1ZG"
+    
+    assert len(result["items"]) == 1
+    item = result["items"][0]
+    assert (item["hsn"], item["unitPrice"], item["taxableValue"], item["gstRate"]) == ("2520", 263.0, 39187.0, 5.0)
+    
+    totals = result["totals"]
+    assert (totals["subTotal"], totals["cgst"], totals["sgst"]) == (39187.0, 979.68, 979.68)
+    assert totals["totalTax"] == 1959.36
+    assert totals["totalInWords"] == "Forty One Thousand One Hundred and Forty Six Rupees only"
+
+
+def test_row_starts_same_on_list_and_array():
+    """group_rows feeds _row_starts a list (plain Python) or a float64 array (numba)."""
+    cys = [10.0, 12.0, 30.0, 31.0, 44.0, 80.0, 93.0, 95.0]
+    assert _row_starts(cys, 14.0).tolist() == [0, 2, 5]
+    assert _row_starts(np.asarray(cys), 14.0).tolist() == [0, 2, 5]
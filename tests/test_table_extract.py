@@ -0,0 +1,41 @@
+from src.services.table_extract import _snap_to_columns
+
+
+def _token(text, cx, cy=10.0):
+    return {
+        "text": text,
+        "bbox": [[cx - 5, cy - 5], [cx + 5, cy - 5], [cx + 5, cy + 5], [cx - 5, cy + 5]],
+        "_cx": cx,
+        "_cy": cy
+    }
+
+
+def test_snap_to_columns_empty():
+    assert _snap_to_columns([]) == ({}, [])
+    assert _snap_to_columns([{"text": "no box"}]) == ({}, [])
+
+
+def test_snap_to_columns_cuts_widest_gaps():
+    tokens = [_token(t, x) for t, x in [("a", 10), ("b", 14), ("c", 100), ("d", 104), ("e", 300)]]
+    column_tokens, centers = _snap_to_columns(tokens, n_columns=3)
+    assert centers == [12.0, 102.0, 300.0]
+    assert {col: [t["text"] for t in toks] for col, toks in column_tokens.items()} == {
+        0: ["a", "b"], 1: ["c", "d"], 2: ["e"]
+    }
+
+
+def test_snap_to_columns_equal_gaps_cut_left_first():
+    tokens = [_token(t, x) for t, x in [("a", 0), ("b", 10), ("c", 20), ("d", 30)]]
+    column_tokens, centers = _snap_to_columns(tokens, n_columns=2)
+    assert centers == [0.0, 20.0]
+    # "b" sits on the midpoint between the two centers; ties go left
+    assert [t["text"] for t in column_tokens[0]] == ["a", "b"]
+    assert [t["text"] for t in column_tokens[1]] == ["c", "d"]
+
+
+def test_snap_to_columns_fewer_tokens_than_columns():
+    tokens = [_token("a", 50), _token("b", 150)]
+    column_tokens, centers = _snap_to_columns(tokens, n_columns=5)
+    assert centers == [50.0, 150.0]
+    assert [len(column_tokens[i]) for i in range(2)] == [1, 1]
+